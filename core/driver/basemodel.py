@@ -3,7 +3,7 @@ from enum import Enum
 from hashlib import sha1
 from base64 import urlsafe_b64encode
 from dataclasses import dataclass, field
-from typing import List, Any, NoReturn
+from typing import List, Dict, Any, NoReturn, Tuple, Union, Iterable, Iterator, BinaryIO
 
 
 def id_algorithm(str_input: str) -> bytes:
@@ -20,6 +20,19 @@ def id_algorithm(str_input: str) -> bytes:
     )
 
 
+def picklable(value: Any) -> Any:
+    """
+    Replace the memoryviews within a value by bytes, memoryviews can't be pickled
+    :param value: The value, memoryviews within lists and tuples are replaced too
+    :return: The value without memoryviews
+    """
+    if isinstance(value, memoryview):
+        return bytes(value)
+    elif isinstance(value, (list, tuple)):
+        return type(value)(map(picklable, value))
+    return value
+
+
 class typeInput(Enum):
     """
     Length of input the model wants
@@ -60,6 +73,14 @@ class base:
         """
         self.id = id_algorithm(self.name + str(self.nonce))
 
+    @classmethod
+    def type_id(cls) -> bytes:
+        """
+        Get the ID every object of this type gets from update_id(), without making an object
+        :return: Hash of the default key attributes
+        """
+        return id_algorithm(cls.name + str(cls.nonce))
+
     @staticmethod
     def __export__(model: 'base') -> List[Any]:
         """
@@ -78,6 +99,19 @@ class base:
         """
         raise TypeError("This model can't be imported")
 
+    def __getstate__(self) -> Dict[str, Any]:
+        # Precomputed tables can be views on a memory mapped file (see binary.loads), these are pickled as bytes
+        return {key: picklable(value) for key, value in self.__dict__.items()}
+
+    @staticmethod
+    def __share__(model: 'base') -> Union['base', None]:
+        """
+        Magic method for sharing imported helpers (see encoder.helperTable)
+        Return the model itself if it never changes, a cheap copy if it can be changed by the models using it
+        :return: Model for another user, None if it should be imported again
+        """
+        return None
+
 
 @dataclass
 class baseHelper(base):
@@ -104,6 +138,14 @@ class baseModel(base):
         """
         self.id = id_algorithm(self.name + str(self.nonce) + str(typeInput))
 
+    @classmethod
+    def type_id(cls) -> bytes:
+        """
+        Get the ID every object of this type gets from update_id(), without making an object
+        :return: Hash of the default key attributes
+        """
+        return id_algorithm(cls.name + str(cls.nonce) + str(typeInput))
+
     def encrypt(self, content: bytes) -> bytes:
         """
         Encrypt the input that is given
@@ -120,6 +162,205 @@ class baseModel(base):
         """
         raise TypeError("This model isn't capable to decrypt")
 
+    def encrypt_buffer(self, content: bytearray, offset: int = 0) -> bytearray:
+        """
+        Encrypt a whole message or a part of it in one call. Only used for typeInput.char models.
+        Define if the model can do better than calling encrypt() for every char. Models that keep a position should
+        take it from the offset instead of changing their state, so the model can be shared
+        :param content: bytes you want encrypted
+        :param offset: Index of the content in the message
+        :return: encrypted input
+        """
+        new_content = bytearray()
+        for char in content:
+            new_content += self.encrypt(char)
+        return new_content
+
+    def decrypt_buffer(self, content: bytearray, offset: int = 0) -> bytearray:
+        """
+        Decrypt a whole message or a part of it in one call, see encrypt_buffer()
+        :param content: bytes you want decrypted
+        :param offset: Index of the content in the message
+        :return: decrypted input
+        """
+        new_content = bytearray()
+        for char in content:
+            new_content += self.decrypt(char)
+        return new_content
+
+    def __hidden_into(self, content: bytearray, target: bytearray, encrypt: bool) -> None:
+        if isinstance(content, memoryview):
+            # The model functions use the methods of bytes
+            content = bytes(content)
+
+        if self.chunk_alignment() > 0:
+            # The whole message is one part, which doesn't change the state of the model
+            target[:] = self.encrypt_chunk(content, 0, len(content)) if encrypt else \
+                self.decrypt_chunk(content, 0, len(content))
+        elif self.type == typeInput.char:
+            target[:] = self.encrypt_buffer(content) if encrypt else self.decrypt_buffer(content)
+        elif self.type == typeInput.all:
+            # encrypt() and decrypt() may change the content they are given
+            target[:] = self.encrypt(bytearray(content)) if encrypt else self.decrypt(bytearray(content))
+        else:
+            raise TypeError("typeInput.other is not supported yet")
+
+    def encrypt_into(self, content: bytearray, target: bytearray) -> None:
+        """
+        Encrypt a whole message into a buffer of the same length. Only used when preserves_length() is True.
+        Define if the model can write to the target instead of making a new buffer
+        :param content: bytes you want encrypted, can be the buffer of the caller so don't change it
+        :param target: buffer the encrypted input is written to
+        """
+        self.__hidden_into(content, target, encrypt=True)
+
+    def decrypt_into(self, content: bytearray, target: bytearray) -> None:
+        """
+        Decrypt a whole message into a buffer of the same length, see encrypt_into()
+        :param content: bytes you want decrypted
+        :param target: buffer the decrypted input is written to
+        """
+        self.__hidden_into(content, target, encrypt=False)
+
+    def preserves_length(self) -> bool:
+        """
+        Define if the output of the model always has the same length as its input
+        :return: If the length is preserved
+        """
+        return False
+
+    def chunk_alignment(self) -> int:
+        """
+        Define if the model can encrypt parts of a message independently of each other (see encrypt_chunk).
+        The encrypter prefers the chunk functions, so models that define them can be used by many threads at once
+        :return: Parts have to start at a multiple of this, 0 if the model needs the whole message
+        """
+        return 0
+
+    def encrypt_chunk(self, content: bytearray, offset: int, length: int) -> bytearray:
+        """
+        Encrypt a part of a message. Only used when chunk_alignment() isn't 0.
+        The result only depends on the arguments and the key, the model isn't changed (it has no position to keep)
+        :param content: Part of the message you want encrypted
+        :param offset: Index of the part in the message, a multiple of chunk_alignment()
+        :param length: Length of the whole message
+        :return: encrypted part
+        """
+        raise TypeError("This model isn't capable to encrypt parts of a message")
+
+    def decrypt_chunk(self, content: bytearray, offset: int, length: int) -> bytearray:
+        """
+        Decrypt a part of a message. Only used when chunk_alignment() isn't 0
+        :param content: Part of the message you want decrypted
+        :param offset: Index of the part in the message, a multiple of chunk_alignment()
+        :param length: Length of the whole message
+        :return: decrypted part
+        """
+        raise TypeError("This model isn't capable to decrypt parts of a message")
+
+    def can_stream(self) -> bool:
+        """
+        Define if the model can encrypt a message that arrives in parts without holding all of it (see encrypt_stream)
+        :return: If the model streams, typeInput.char models do by default
+        """
+        return self.type == typeInput.char
+
+    def __hidden_stream(self, chunks: Iterable[bytes], encrypt: bool) -> Iterator[bytearray]:
+        if self.type == typeInput.char:
+            # Char models get the offset of every part in the message, so every part can be handled on arrival
+            offset = 0
+            for chunk in chunks:
+                if encrypt:
+                    yield self.encrypt_buffer(bytearray(chunk), offset)
+                else:
+                    yield self.decrypt_buffer(bytearray(chunk), offset)
+                offset += len(chunk)
+
+        elif self.type == typeInput.all:
+            content = bytearray()
+            for chunk in chunks:
+                content += chunk
+            yield self.encrypt(content) if encrypt else self.decrypt(content)
+
+        else:
+            raise TypeError("typeInput.other is not supported yet")
+
+    def encrypt_stream(self, chunks: Iterable[bytes]) -> Iterator[bytearray]:
+        """
+        Encrypt a message that arrives in parts. Define if the model can stream while it isn't a typeInput.char
+        model, by default these collect the whole message first
+        :param chunks: Parts of the message you want encrypted
+        :return: Encrypted parts, these don't have to line up with the given parts
+        """
+        return self.__hidden_stream(chunks, encrypt=True)
+
+    def decrypt_stream(self, chunks: Iterable[bytes]) -> Iterator[bytearray]:
+        """
+        Decrypt a message that arrives in parts. Define if the model can stream while it isn't a typeInput.char
+        model, by default these collect the whole message first
+        :param chunks: Parts of the message you want decrypted
+        :return: Decrypted parts, these don't have to line up with the given parts
+        """
+        return self.__hidden_stream(chunks, encrypt=False)
+
+    def can_seek(self) -> bool:
+        """
+        Define if the model needs the whole message, but can encrypt a seekable file with bounded memory
+        (see encrypt_file)
+        :return: If the model can seek
+        """
+        return False
+
+    def encrypt_file(self, source: BinaryIO, target: BinaryIO, length: int, buffer_size: int) -> None:
+        """
+        Encrypt a message in a seekable file to another seekable file. Only used when can_seek() is True
+        :param source: File holding the message from its current position
+        :param target: File the encrypted message is written to from its current position
+        :param length: Length of the message
+        :param buffer_size: Amount of bytes the model may hold at once
+        """
+        raise TypeError("This model isn't capable to encrypt files")
+
+    def decrypt_file(self, source: BinaryIO, target: BinaryIO, length: int, buffer_size: int) -> None:
+        """
+        Decrypt a message in a seekable file to another seekable file. Only used when can_seek() is True
+        :param source: File holding the message from its current position
+        :param target: File the decrypted message is written to from its current position
+        :param length: Length of the message
+        :param buffer_size: Amount of bytes the model may hold at once
+        """
+        raise TypeError("This model isn't capable to decrypt files")
+
+    def substitution(self, encrypt: bool) -> Union[Tuple[bytes, bytes], None]:
+        """
+        Define if the model is a typeInput.char model that always replaces a char with the same char, no matter its
+        position or the chars before it. The encrypter fuses runs of these models into one translation table
+        :param encrypt: If the table is used for encrypting or decrypting
+        :return: 256 byte translation table and the chars the model accepts, None if the model isn't a substitution
+        """
+        return None
+
+    def accepted_chars(self, encrypt: bool) -> Union[bytes, None]:
+        """
+        Define if the model raises a ValueError for some chars, so a message can be checked before it is changed
+        :param encrypt: If the chars are encrypted or decrypted
+        :return: The chars the model accepts, None if it accepts every char
+        """
+        return None
+
+    def output_chars(self, chars: bytes, encrypt: bool) -> Union[bytes, None]:
+        """
+        Define if the chars the model gives are known, so the accepted chars of the next model can be checked too.
+        Substitutions give the translated chars
+        :param chars: The chars of the message, all accepted by the model
+        :param encrypt: If the chars are encrypted or decrypted
+        :return: Every char the model can give for a message of these chars, None if that isn't known
+        """
+        substitution = self.substitution(encrypt)
+        if substitution is None:
+            return None
+        return chars.translate(substitution[0])
+
     def reset(self, after_encryption: bool) -> None:
         """
         Reset the model. Define if needed. Will be called after every encrypt or decrypt call
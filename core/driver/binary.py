@@ -0,0 +1,197 @@
+# Library's
+import struct
+from typing import List, Any, Tuple, Union
+
+# First bytes of every binary encrypter file
+MAGIC = b'ENCB'
+
+# Version of the format, files with a newer version can't be read
+VERSION = 2
+
+# Flags of the header
+FLAG_TABLES = 1 << 0
+FLAG_SECTION = 1 << 1
+
+# Magic, version and flags
+HEADER = struct.Struct('<4sHH')
+
+# Size of the table section, follows the header if FLAG_SECTION is set
+SECTION = struct.Struct('<Q')
+
+# Tags that precede every value
+TAG_NONE = 0
+TAG_FALSE = 1
+TAG_TRUE = 2
+TAG_INT = 3
+TAG_STR = 4
+TAG_BYTES = 5
+TAG_LIST = 6
+TAG_TABLE = 7
+
+
+class sectionBytes(bytes):
+    """
+    Bytes that are stored in the table section instead of between the values. A table is read back as a view on the
+    data it is loaded from, so the tables of a memory mapped file are never copied
+    """
+    pass
+
+
+def is_binary(data: bytes) -> bool:
+    """
+    Check if data is in the binary format
+    :param data: Content of a file
+    :return: If the data starts with the magic
+    """
+    return data[:len(MAGIC)] == MAGIC
+
+
+def _dump_uint(number: int, out: bytearray) -> None:
+    # 7 bits per byte, the highest bit tells if another byte follows
+    while number > 0x7f:
+        out.append(number & 0x7f | 0x80)
+        number >>= 7
+    out.append(number)
+
+
+def _load_uint(data: memoryview, offset: int) -> Tuple[int, int]:
+    number = shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        number |= (byte & 0x7f) << shift
+        shift += 7
+        if not byte & 0x80:
+            return number, offset
+
+
+def dump_value(value: Any, out: bytearray, section: Union[bytearray, None] = None) -> None:
+    """
+    Append a value to the output, values are None, bools, ints, strings, bytes and lists (or tuples) of them
+    :param value: The value
+    :param out: The output
+    :param section: Table section the sectionBytes are added to, they are stored as bytes if not given
+    """
+    if value is None:
+        out.append(TAG_NONE)
+    elif isinstance(value, bool):
+        out.append(TAG_TRUE if value else TAG_FALSE)
+    elif isinstance(value, int):
+        out.append(TAG_INT)
+        # Zigzag encoding keeps small negative numbers small
+        _dump_uint(value * 2 if value >= 0 else -value * 2 - 1, out)
+    elif isinstance(value, str):
+        encoded = value.encode('utf-8')
+        out.append(TAG_STR)
+        _dump_uint(len(encoded), out)
+        out += encoded
+    elif isinstance(value, sectionBytes) and section is not None:
+        # The table is referred to by its offset and length in the section
+        out.append(TAG_TABLE)
+        _dump_uint(len(section), out)
+        _dump_uint(len(value), out)
+        section += value
+    elif isinstance(value, (bytes, bytearray, memoryview)):
+        out.append(TAG_BYTES)
+        _dump_uint(len(value), out)
+        out += value
+    elif isinstance(value, (list, tuple)):
+        out.append(TAG_LIST)
+        _dump_uint(len(value), out)
+        for item in value:
+            dump_value(item, out, section)
+    else:
+        raise TypeError(f"Value of type '{type(value)}' can't be stored in the binary format")
+
+
+def load_value(data: memoryview, offset: int, section: Union[memoryview, None] = None) -> Tuple[Any, int]:
+    """
+    Read a value written by dump_value()
+    :param data: The data
+    :param offset: Index of the value in the data
+    :param section: Table section of the data
+    :return: The value and the index after it
+    """
+    tag = data[offset]
+    offset += 1
+
+    if tag == TAG_NONE:
+        return None, offset
+    elif tag in (TAG_FALSE, TAG_TRUE):
+        return tag == TAG_TRUE, offset
+    elif tag == TAG_INT:
+        number, offset = _load_uint(data, offset)
+        return number // 2 if not number & 1 else -(number + 1) // 2, offset
+    elif tag in (TAG_STR, TAG_BYTES):
+        size, offset = _load_uint(data, offset)
+        if offset + size > len(data):
+            raise ValueError("Value is longer than the data")
+        value = bytes(data[offset:offset + size])
+        return value.decode('utf-8') if tag == TAG_STR else value, offset + size
+    elif tag == TAG_TABLE:
+        table_offset, offset = _load_uint(data, offset)
+        size, offset = _load_uint(data, offset)
+        if section is None or table_offset + size > len(section):
+            raise ValueError("Table is outside of the table section")
+        return section[table_offset:table_offset + size], offset
+    elif tag == TAG_LIST:
+        size, offset = _load_uint(data, offset)
+        values = []
+        for _ in range(size):
+            value, offset = load_value(data, offset, section)
+            values.append(value)
+        return values, offset
+    raise ValueError(f"Unknown tag {tag} at index {offset - 1}")
+
+
+def dumps(document: List[Any], tables: bool = False) -> bytes:
+    """
+    Make the content of a binary file
+    :param document: Values of the file
+    :param tables: If the values hold precomputed tables, sectionBytes are then stored in the table section
+    :return: Header, the table section if there are tables in it and the values
+    """
+    out = bytearray()
+    section = bytearray() if tables else None
+    dump_value(document, out, section)
+
+    flags = FLAG_TABLES if tables else 0
+    if not section:
+        return HEADER.pack(MAGIC, VERSION, flags) + out
+    return HEADER.pack(MAGIC, VERSION, flags | FLAG_SECTION) + SECTION.pack(len(section)) + section + out
+
+
+def loads(data: bytes) -> List[Any]:
+    """
+    Read the content of a binary file. The tables of the table section are views on the data, so memory mapped data
+    stays mapped as long as they are used
+    :param data: Content of the file, bytes or any object with the buffer protocol (like mmap)
+    :return: Values of the file
+    """
+    if len(data) < HEADER.size or not is_binary(data):
+        raise ValueError("Data is not in the binary format")
+
+    _, version, flags = HEADER.unpack_from(data)
+    if version > VERSION:
+        raise ValueError(f"Version {version} of the binary format is not supported")
+
+    view = memoryview(data)
+    offset = HEADER.size
+    section = None
+    if flags & FLAG_SECTION:
+        if len(data) < offset + SECTION.size:
+            raise ValueError("Data ends within the header")
+        size, = SECTION.unpack_from(data, offset)
+        offset += SECTION.size
+        if offset + size > len(data):
+            raise ValueError("Data ends within the table section")
+        section = view[offset:offset + size]
+        offset += size
+
+    try:
+        document, offset = load_value(view, offset, section)
+    except IndexError:
+        raise ValueError("Data ends within a value")
+    if offset != len(data):
+        raise ValueError("Data continues after the values")
+    return document
@@ -1,12 +1,93 @@
 # Libraries
-from typing import Dict, Any, Type
+import importlib
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Dict, Any, Type, List, Iterable, Union
 
 # Drivers
-from core.driver.basemodel import base
+from core.driver.basemodel import base, baseHelper
+from core.driver.registry import TYPE_MODULES
+from core.driver.binary import sectionBytes
 
 # Global variables
 type_registry: Dict[str, Dict[str, Any]] = dict()
 
+# Set while exporting to a format that can hold precomputed tables, see tables_exported()
+export_tables: ContextVar[bool] = ContextVar('export_tables', default=False)
+
+
+# First value of a reference to the helper table (see helperTable), type ids never start with it
+HELPER_REFERENCE = '#'
+
+
+@dataclass
+class helperTable:
+    """
+    Helpers of one export. Every distinct helper is stored once, the models refer to it by its index.
+    On import a helper is built once and given to every model that refers to it if its type allows it (see
+    base.__share__), otherwise it is built for every model
+    """
+    records: List[Any] = field(default_factory=list)
+
+    __indexes: Dict[str, int] = field(default_factory=dict, init=False, repr=False)
+    __imported: Dict[int, base] = field(default_factory=dict, init=False, repr=False)
+
+    def add(self, record: List[Any]) -> int:
+        """
+        Add an exported helper, a helper with the same content is only added once
+        :param record: The exported helper
+        :return: Index of the helper in the table
+        """
+        # repr() tells apart every value an export can hold (bytes, floats, dicts, ...) in any format
+        key = repr(record)
+        if key not in self.__indexes:
+            self.__indexes[key] = len(self.records)
+            self.records.append(record)
+        return self.__indexes[key]
+
+    def get(self, index: int) -> base:
+        """
+        Get the imported helper at the given index
+        :param index: Index of the helper in the table
+        :return: The helper, shared with other models if possible
+        """
+        if index in self.__imported:
+            imported = self.__imported[index]
+            shared = type(imported).__share__(imported)
+            return shared if shared is not None else import_model(self.records[index])
+
+        imported = import_model(self.records[index])
+        shared = type(imported).__share__(imported)
+        if shared is None:
+            return imported
+
+        # The first import is kept as it is, every model gets a share of it
+        self.__imported[index] = imported
+        return shared
+
+
+# Set while exporting or importing with a helper table, see export_models() and import_models()
+helper_table: ContextVar[Union[helperTable, None]] = ContextVar('helper_table', default=None)
+
+
+def tables_exported() -> bool:
+    """
+    Function that tells __export__ methods to add their precomputed tables to the attributes. Tables are bytes, so
+    they are only added for the binary format. __import__ methods have to work with and without them
+    :return: If tables are exported
+    """
+    return export_tables.get()
+
+
+def export_table(table: Union[bytes, bytearray, memoryview]) -> bytes:
+    """
+    Function that marks a precomputed table for __export__ methods. The binary format stores it in its table section,
+    so it is given back to __import__ as a view on the file instead of a copy
+    :param table: The table
+    :return: The marked table
+    """
+    return sectionBytes(table)
+
 
 def register_encrypter_type(obj_type: Type[base], size: int) -> bool:
     """
@@ -18,7 +99,7 @@ def register_encrypter_type(obj_type: Type[base], size: int) -> bool:
     if not issubclass(obj_type, base):
         raise TypeError('Other than base is not supported')
 
-    type_id = obj_type().id.decode('utf-8')
+    type_id = obj_type.type_id().decode('utf-8')
     type_registry[type_id] = {
         'type': obj_type,
         'amount_attrs': size
@@ -26,6 +107,23 @@ def register_encrypter_type(obj_type: Type[base], size: int) -> bool:
     return True
 
 
+def get_encrypter_type(type_id: str) -> Type[base]:
+    """
+    Function that gets a registered encrypter type. Types of the manifest (see registry.TYPE_MODULES) are imported
+    and registered the first time their id is asked for
+    :param type_id: Id of the type
+    :return: The type
+    """
+    if type_id not in type_registry:
+        try:
+            module_name = TYPE_MODULES[type_id]
+        except KeyError:
+            raise TypeError(f"id {type_id} not found")
+        register_encrypter_type(importlib.import_module(module_name).MAIN_MODULE, 1)
+
+    return type_registry[type_id]['type']
+
+
 def export_model(obj: base):
     if obj is None:
         return None
@@ -34,8 +132,8 @@ def export_model(obj: base):
 
     obj_id = obj.id.decode('utf-8')
     try:
-        encoder = type_registry[obj_id]['type'].__export__
-    except AttributeError:
+        encoder = get_encrypter_type(obj_id).__export__
+    except TypeError:
         raise RuntimeError(f"id '{obj_id}' not found")
 
     # Here should be a try except clause
@@ -43,7 +141,13 @@ def export_model(obj: base):
 
     if not isinstance(encoded_obj, list):
         raise TypeError("encode_fallback didn't return a list")
-    return [obj_id] + encoder(obj)
+    encoded_obj = [obj_id] + encoded_obj
+
+    # Helpers go to the helper table of the export, if there is one
+    table = helper_table.get()
+    if table is not None and isinstance(obj, baseHelper):
+        return [HELPER_REFERENCE, table.add(encoded_obj)]
+    return encoded_obj
 
 
 def import_model(attributes: Any):
@@ -52,10 +156,13 @@ def import_model(attributes: Any):
 
     model_id, *attributes = attributes
 
-    try:
-        decoder = type_registry[model_id]['type'].__import__
-    except KeyError:
-        raise TypeError(f"id {model_id} not found")
+    if model_id == HELPER_REFERENCE:
+        table = helper_table.get()
+        if table is None:
+            raise TypeError("Reference to a helper without a helper table")
+        return table.get(attributes[0])
+
+    decoder = get_encrypter_type(model_id).__import__
 
     # Here should be a try except clause
     decoded_obj = decoder(attributes)
@@ -64,3 +171,34 @@ def import_model(attributes: Any):
         raise TypeError('given model is not a encrypter model')
     return decoded_obj
 
+
+def export_models(models: Iterable[base], tables: bool = False,
+                  helpers: Union[helperTable, None] = None) -> List[Any]:
+    """
+    Function that exports models, with their precomputed tables if asked (see tables_exported())
+    :param models: The models
+    :param tables: If the tables are added, only for formats that can hold bytes
+    :param helpers: Table the helpers are added to, they are exported within the models if not given
+    :return: Exported models
+    """
+    tables_token = export_tables.set(tables)
+    helpers_token = helper_table.set(helpers)
+    try:
+        return [export_model(model) for model in models]
+    finally:
+        helper_table.reset(helpers_token)
+        export_tables.reset(tables_token)
+
+
+def import_models(models: Iterable[Any], helpers: Union[List[Any], None] = None) -> List[base]:
+    """
+    Function that imports models exported by export_models()
+    :param models: Exported models
+    :param helpers: Records of the helper table of the export, if it has one
+    :return: The models
+    """
+    token = helper_table.set(helperTable(helpers) if helpers is not None else None)
+    try:
+        return [import_model(model) for model in models]
+    finally:
+        helper_table.reset(token)
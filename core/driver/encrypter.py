@@ -1,15 +1,136 @@
 # Library's
-from dataclasses import dataclass
-from typing import List, Callable, Union
+import os
+import mmap
+from math import lcm
+from tempfile import TemporaryFile
+from dataclasses import dataclass, field, InitVar, KW_ONLY
+from typing import List, Union, Tuple, BinaryIO, Iterator, Iterable
 
 # Drivers
 from core.driver.basemodel import baseModel, typeInput
+from core.driver.session import encrypterSession
+from core.driver.parallel import run_parallel, run_many, split_stages, is_chunkable, CHUNK_SIZE, BATCH_SIZE
+
+# Default amount of bytes read at once by the stream functions
+STREAM_CHUNK_SIZE = 1 << 16
+
+# Every byte value
+ALL_CHARS = bytes(range(256))
+
+
+@dataclass
+class fusedSubstitution(baseModel):
+    """
+    Model that runs consecutive substitution models (see baseModel.substitution) as one translation table.
+    Only used within the compiled plan of an encrypter, it can't be exported.
+    """
+    # Vars for the inherited model class
+    name: str = field(default='driver.fusedSubstitution', init=False)
+    type: typeInput = field(default=typeInput.char, init=False)
+
+    # Models that are fused, in encryption order
+    models: List[baseModel] = field(default_factory=list)
+
+    # Local variables
+    __encrypt_table: Tuple[bytes, bytes] = field(default=None, init=False, repr=False)
+    __decrypt_table: Tuple[bytes, bytes] = field(default=None, init=False, repr=False)
+
+    _: KW_ONLY
+    tables: InitVar[Union[List[bytes], None]] = None
+
+    def __post_init__(self, tables: Union[List[bytes], None]):
+        if tables is not None:
+            # Precomputed encrypt and decrypt tables with their accepted chars, see get_tables(). The translation
+            # tables are used as they are, so they can be views on a memory mapped file
+            self.__encrypt_table = (tables[0], bytes(tables[1]))
+            self.__decrypt_table = (tables[2], bytes(tables[3]))
+            if len(self.__encrypt_table[0]) != 256 or len(self.__decrypt_table[0]) != 256:
+                raise ValueError("Precomputed tables aren't translation tables")
+
+            # The decrypt table has to undo the encrypt table for every accepted char
+            accepted = self.__encrypt_table[1]
+            if accepted.translate(self.__encrypt_table[0]).translate(self.__decrypt_table[0]) != accepted:
+                raise ValueError("Precomputed tables don't undo each other")
+        else:
+            self.__encrypt_table = self.__fuse([model.substitution(True) for model in self.models])
+            self.__decrypt_table = self.__fuse([model.substitution(False) for model in reversed(self.models)])
+        self.update_id()
+
+    def get_tables(self) -> List[bytes]:
+        """
+        Get the fused tables, so they can be given to a new fusedSubstitution of the same models
+        :return: Encrypt table, its accepted chars, decrypt table and its accepted chars
+        """
+        return [*self.__encrypt_table, *self.__decrypt_table]
+
+    @staticmethod
+    def __fuse(substitutions: List[Tuple[bytes, bytes]]) -> Tuple[bytes, bytes]:
+        """
+        Combine translation tables into one
+        :param substitutions: Translation tables and accepted chars, in the order they are applied
+        :return: Combined translation table and the chars it accepts
+        """
+        table = bytes(range(256))
+        accepted = set(range(256))
+        for model_table, model_accepted in substitutions:
+            model_accepted = set(model_accepted)
+            accepted.intersection_update(char for char in range(256) if table[char] in model_accepted)
+            table = table.translate(model_table)
+        return table, bytes(sorted(accepted))
+
+    def __hidden_substitute(self, content: bytearray, table: Tuple[bytes, bytes], encrypt: bool) -> bytes:
+        table, accepted = table
+        if isinstance(content, memoryview):
+            content = bytes(content)
+
+        # Chars that aren't accepted are deleted while translating, let the models raise the error for them
+        new_content = content.translate(table, ALL_CHARS.translate(None, accepted))
+        if len(new_content) != len(content):
+            for model in self.models if encrypt else reversed(self.models):
+                content = model.encrypt_buffer(content) if encrypt else model.decrypt_buffer(content)
+            return bytes(content)
+        return new_content
+
+    def encrypt_buffer(self, content: bytearray, offset: int = 0) -> bytearray:
+        return bytearray(self.__hidden_substitute(content, self.__encrypt_table, encrypt=True))
+
+    def decrypt_buffer(self, content: bytearray, offset: int = 0) -> bytearray:
+        return bytearray(self.__hidden_substitute(content, self.__decrypt_table, encrypt=False))
+
+    def encrypt_into(self, content: bytearray, target: bytearray) -> None:
+        target[:] = self.__hidden_substitute(content, self.__encrypt_table, encrypt=True)
+
+    def decrypt_into(self, content: bytearray, target: bytearray) -> None:
+        target[:] = self.__hidden_substitute(content, self.__decrypt_table, encrypt=False)
+
+    def substitution(self, encrypt: bool) -> Tuple[bytes, bytes]:
+        return self.__encrypt_table if encrypt else self.__decrypt_table
+
+    def accepted_chars(self, encrypt: bool) -> bytes:
+        return self.substitution(encrypt)[1]
+
+    def preserves_length(self) -> bool:
+        return all(model.preserves_length() for model in self.models)
+
+    def chunk_alignment(self) -> int:
+        return 1
+
+    def encrypt_chunk(self, content: bytearray, offset: int, length: int) -> bytearray:
+        return self.encrypt_buffer(content)
+
+    def decrypt_chunk(self, content: bytearray, offset: int, length: int) -> bytearray:
+        return self.decrypt_buffer(content)
+
+    def reset(self, after_encryption: bool) -> None:
+        for model in self.models:
+            model.reset(after_encryption)
 
 
 @dataclass
 class encrypter:
     def __init__(self, *models: baseModel):
         self.models: List[baseModel] = list()
+        self.__plan: Union[Tuple[Tuple[int, ...], List[baseModel]], None] = None
         for model in models:
             self.addModel(model)
 
@@ -20,20 +141,86 @@ class encrypter:
         self.models.append(model)
         return True
 
+    def compile(self, tables: Union[List[List[bytes]], None] = None) -> List[baseModel]:
+        """
+        Get the plan the models are run with. Consecutive substitution models are fused into one model, so they take
+        a single pass over the message. The plan is made on first use and again when the models have changed
+        :param tables: Precomputed tables of every fused model (see compiled_tables()), makes the plan again
+        :return: Models in encryption order
+        """
+        # The models list is public, so the plan is made again whenever it holds other models than the plan was made
+        # of. The plan keeps its models alive, so their ids can't be taken by new models
+        plan_models = tuple(map(id, self.models))
+        cached_plan = self.__plan
+        if cached_plan is not None and tables is None and plan_models == cached_plan[0]:
+            return cached_plan[1]
+
+        plan = []
+        run = []
+        fused = 0
+        for model in self.models + [None]:
+            if model is not None and model.type == typeInput.char and model.substitution(True) is not None:
+                run.append(model)
+                continue
+
+            if len(run) > 1:
+                if tables is not None:
+                    if fused >= len(tables):
+                        raise ValueError("Precomputed tables don't fit the models")
+                    plan.append(fusedSubstitution(run, tables=tables[fused]))
+                else:
+                    plan.append(fusedSubstitution(run))
+                fused += 1
+            else:
+                plan += run
+            run = []
+
+            if model is not None:
+                plan.append(model)
+
+        if tables is not None and fused != len(tables):
+            raise ValueError("Precomputed tables don't fit the models")
+
+        # The ids and the plan are replaced at once, so other threads never see the plan of other models
+        self.__plan = (plan_models, plan)
+        return plan
+
+    def compiled_tables(self) -> List[List[bytes]]:
+        """
+        Get the tables of every fused model of the plan, these can be given to compile() of an encrypter with the
+        same models
+        :return: Tables of every fused model, in plan order
+        """
+        return [model.get_tables() for model in self.compile() if isinstance(model, fusedSubstitution)]
+
     @staticmethod
-    def __hidden_encrypt(
-            content: bytearray,
-            model: baseModel,
-            function: Callable[[baseModel, Union[bytearray, int]], bytearray]
-    ) -> bytearray:
+    def __reset(model: baseModel, encrypt: bool) -> None:
+        # The chunk functions don't change the model (see baseModel.encrypt_chunk), so it is shared by many calls
+        if not is_chunkable(model):
+            model.reset(after_encryption=encrypt)
 
+    @staticmethod
+    def __hidden_encrypt(content: bytearray, model: baseModel, encrypt: bool) -> bytearray:
         new_content = bytearray()
-        if model.type == typeInput.char:
-            for letter in content:
-                new_content += function(model, letter)
+        if model.preserves_length() and model.chunk_alignment() > 0:
+            # The whole message is one part, the chunk functions don't change the model (see baseModel.encrypt_chunk)
+            if encrypt:
+                new_content += model.encrypt_chunk(content, 0, len(content))
+            else:
+                new_content += model.decrypt_chunk(content, 0, len(content))
+
+        elif model.type == typeInput.char:
+            # Char models get the whole message at once, baseModel falls back to one call per char
+            if encrypt:
+                new_content += model.encrypt_buffer(content)
+            else:
+                new_content += model.decrypt_buffer(content)
 
         elif model.type == typeInput.all:
-            new_content += function(model, content)
+            if encrypt:
+                new_content += model.encrypt(content)
+            else:
+                new_content += model.decrypt(content)
 
         else:
             raise TypeError("typeInput.other is not supported yet")
@@ -43,19 +230,413 @@ class encrypter:
     def encrypt(self, content: bytes) -> bytes:
         content = bytearray(content)
 
-        for model in self.models:
-            content = self.__hidden_encrypt(content, model, lambda m, c: m.encrypt(c))
-            model.reset(after_encryption=True)
+        for model in self.compile():
+            content = self.__hidden_encrypt(content, model, encrypt=True)
+            self.__reset(model, True)
         return bytes(content)
 
     def decrypt(self, content: bytes) -> bytes:
         content = bytearray(content)
 
-        for model in reversed(self.models):
-            content = self.__hidden_encrypt(content, model, lambda m, c: m.decrypt(c))
-            model.reset(after_encryption=False)
+        for model in reversed(self.compile()):
+            content = self.__hidden_encrypt(content, model, encrypt=False)
+            self.__reset(model, False)
         return bytes(content)
 
+    def __hidden_encrypt_into(self, source, target, encrypt: bool) -> int:
+        models = self.compile() if encrypt else list(reversed(self.compile()))
+        for model in models:
+            if not model.preserves_length():
+                raise TypeError(f"Model '{model.name}' doesn't preserve the length, it can't write into a buffer")
+
+        source_view = memoryview(source).cast('B')
+        target = memoryview(target).cast('B')
+        if target.readonly:
+            raise TypeError("Target buffer is read-only")
+        if len(target) != len(source_view):
+            raise ValueError(f"Target buffer has length {len(target)}, it should have length {len(source_view)}")
+
+        # Models read bytes and bytearrays as they are, other buffers through a view
+        content = source if isinstance(source, (bytes, bytearray)) else source_view
+        if source_view.obj is target.obj or not models:
+            # A model can't read the memory it writes to, so a source within the target is copied once
+            content = bytearray(source_view)
+            if not models:
+                target[:] = content
+
+        # The first model reads the source and the last one writes the target, the models in between alternate
+        # between two work buffers
+        buffers = [bytearray(len(target)) for _ in range(min(len(models) - 1, 2))]
+        for index, model in enumerate(models):
+            if index == len(models) - 1:
+                new_content = view = target
+            else:
+                # Models write through a view, assigning a view to a slice of a bytearray would copy it first
+                new_content = buffers[index % 2]
+                view = memoryview(new_content)
+
+            if encrypt:
+                model.encrypt_into(content, view)
+            else:
+                model.decrypt_into(content, view)
+            self.__reset(model, encrypt)
+            content = new_content
+        return len(target)
+
+    def encrypt_into(self, source, target) -> int:
+        """
+        Encrypt a buffer into another buffer of the same length, e.g. a bytearray, memoryview, mmap or array.
+        Only possible when every model preserves the length (see baseModel.preserves_length). The first model reads
+        the source and the last one writes the target, at most two work buffers are used between them. Models that
+        don't define encrypt_into (like the char models) still make a new buffer for their output.
+        :param source: Object with the buffer protocol holding the bytes you want encrypted
+        :param target: Writable object with the buffer protocol the encrypted input is written to
+        :return: Amount of bytes written
+        """
+        return self.__hidden_encrypt_into(source, target, encrypt=True)
+
+    def decrypt_into(self, source, target) -> int:
+        """
+        Decrypt a buffer into another buffer of the same length, see encrypt_into()
+        :param source: Object with the buffer protocol holding the bytes you want decrypted
+        :param target: Writable object with the buffer protocol the decrypted input is written to
+        :return: Amount of bytes written
+        """
+        return self.__hidden_encrypt_into(source, target, encrypt=False)
+
+    def encrypt_parallel(self, content: bytes, workers: Union[int, None] = None, chunk_size: int = CHUNK_SIZE) -> bytes:
+        """
+        Encrypt with a pool of worker processes, the output is the same as encrypt(). Models that can be split
+        (see baseModel.chunk_alignment) get parts of the message in the workers, the others run in this process.
+        :param content: bytes you want encrypted
+        :param workers: Amount of worker processes, defaults to the amount of CPUs
+        :param chunk_size: Size of the parts given to the workers
+        :return: encrypted input
+        """
+        content = run_parallel(
+            self.compile(), bytearray(content), True,
+            lambda c, m: self.__hidden_encrypt(c, m, encrypt=True), workers, chunk_size
+        )
+        for model in self.compile():
+            self.__reset(model, True)
+        return content
+
+    def decrypt_parallel(self, content: bytes, workers: Union[int, None] = None, chunk_size: int = CHUNK_SIZE) -> bytes:
+        """
+        Decrypt with a pool of worker processes, the output is the same as decrypt()
+        :param content: bytes you want decrypted
+        :param workers: Amount of worker processes, defaults to the amount of CPUs
+        :param chunk_size: Size of the parts given to the workers
+        :return: decrypted input
+        """
+        content = run_parallel(
+            self.compile(), bytearray(content), False,
+            lambda c, m: self.__hidden_encrypt(c, m, encrypt=False), workers, chunk_size
+        )
+        for model in reversed(self.compile()):
+            self.__reset(model, False)
+        return content
+
+    def encrypt_session(self) -> encrypterSession:
+        """
+        Start encrypting a message that arrives in fragments, see encrypterSession. The models aren't changed, so
+        many sessions can run at the same time
+        :return: Session with update(), finalize(), checkpoint() and restore()
+        """
+        return encrypterSession(self.compile(), True, lambda c, m: self.__hidden_encrypt(c, m, encrypt=True))
+
+    def decrypt_session(self) -> encrypterSession:
+        """
+        Start decrypting a message that arrives in fragments, see encrypt_session()
+        :return: Session with update(), finalize(), checkpoint() and restore()
+        """
+        return encrypterSession(
+            list(reversed(self.compile())), False, lambda c, m: self.__hidden_encrypt(c, m, encrypt=False)
+        )
+
+    def __hidden_many(self, contents: List[bytearray], encrypt: bool) -> List[bytearray]:
+        models = self.compile() if encrypt else list(reversed(self.compile()))
+
+        for model in models:
+            if model.type == typeInput.char and model.substitution(encrypt) is not None:
+                # Substitutions don't depend on the position of a char, so the batch is translated at once
+                try:
+                    content = memoryview(self.__hidden_encrypt(bytearray().join(contents), model, encrypt))
+                    self.__reset(model, encrypt)
+                except ValueError:
+                    # Let the message with the char that doesn't fit raise the error
+                    content = None
+                    self.__reset(model, encrypt)
+
+                if content is not None:
+                    start = 0
+                    for index, message in enumerate(contents):
+                        contents[index] = bytearray(content[start:start + len(message)])
+                        start += len(message)
+                    continue
+
+            for index, message in enumerate(contents):
+                contents[index] = self.__hidden_encrypt(message, model, encrypt)
+                self.__reset(model, encrypt)
+        return contents
+
+    def encrypt_many(self, messages: Iterable[bytes], workers: int = 0, batch_size: int = BATCH_SIZE) -> List[bytes]:
+        """
+        Encrypt many messages, every message is encrypted as if encrypt() is called for it. Every model handles all
+        messages before the next model, substitution models translate all messages at once.
+        :param messages: bytes you want encrypted, per message
+        :param workers: Amount of worker processes that get batches of messages, 0 encrypts in this process
+        :param batch_size: Amount of messages per batch given to a worker
+        :return: encrypted input, per message and in the same order
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size should be at least 1")
+        if workers:
+            return run_many(self, list(messages), True, workers, batch_size)
+        return [bytes(content) for content in self.__hidden_many([bytearray(m) for m in messages], encrypt=True)]
+
+    def decrypt_many(self, messages: Iterable[bytes], workers: int = 0, batch_size: int = BATCH_SIZE) -> List[bytes]:
+        """
+        Decrypt many messages, every message is decrypted as if decrypt() is called for it, see encrypt_many()
+        :param messages: bytes you want decrypted, per message
+        :param workers: Amount of worker processes that get batches of messages, 0 decrypts in this process
+        :param batch_size: Amount of messages per batch given to a worker
+        :return: decrypted input, per message and in the same order
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size should be at least 1")
+        if workers:
+            return run_many(self, list(messages), False, workers, batch_size)
+        return [bytes(content) for content in self.__hidden_many([bytearray(m) for m in messages], encrypt=False)]
+
+    def can_stream(self) -> bool:
+        """
+        Check if encrypt_stream() and decrypt_stream() run in bounded memory
+        :return: If every model streams or can seek (see baseModel.can_stream and baseModel.can_seek)
+        """
+        return all(model.can_stream() or model.can_seek() for model in self.models)
+
+    @staticmethod
+    def __read_chunks(reader: BinaryIO, chunk_size: int) -> Iterator[bytes]:
+        while chunk := reader.read(chunk_size):
+            yield chunk
+
+    def __seek_stage(self, model: baseModel, chunks: Iterator[bytes], source: Union[BinaryIO, None],
+                     chunk_size: int, encrypt: bool) -> Iterator[bytes]:
+        """
+        Run a model that needs the whole message but can seek (see baseModel.can_seek) within a stream. Its input is
+        only written to a temporary file when no seekable source is given, its output goes to a temporary file.
+        :param model: The model
+        :param chunks: Parts of the input of the model
+        :param source: Seekable file holding the input from its current position to its end, or None
+        :param chunk_size: Amount of bytes the model may hold and that is read at once
+        :param encrypt: If the model encrypts or decrypts
+        :return: Parts of the output of the model
+        """
+        if source is None:
+            # The input only has to be spooled when it can't be read back from the source
+            with TemporaryFile() as spool:
+                for chunk in chunks:
+                    spool.write(chunk)
+                spool.seek(0)
+                yield from self.__seek_stage(model, chunks, spool, chunk_size, encrypt)
+            return
+
+        with TemporaryFile() as target:
+            start = source.tell()
+            length = source.seek(0, os.SEEK_END) - start
+            source.seek(start)
+
+            if encrypt:
+                model.encrypt_file(source, target, length, chunk_size)
+            else:
+                model.decrypt_file(source, target, length, chunk_size)
+            source.seek(start + length)
+
+            target.seek(0)
+            yield from self.__read_chunks(target, chunk_size)
+
+    def __hidden_stream(self, reader: BinaryIO, writer: BinaryIO, chunk_size: int, encrypt: bool) -> int:
+        models = self.compile() if encrypt else list(reversed(self.compile()))
+
+        chunks = self.__read_chunks(reader, chunk_size)
+        for index, model in enumerate(models):
+            if model.can_stream() or not model.can_seek():
+                chunks = model.encrypt_stream(chunks) if encrypt else model.decrypt_stream(chunks)
+            else:
+                # Only the first model can use the reader itself as its input, readers only need a read() method
+                seekable = index == 0 and getattr(reader, 'seekable', lambda: False)()
+                source = reader if seekable else None
+                chunks = self.__seek_stage(model, chunks, source, chunk_size, encrypt)
+
+        written = 0
+        for chunk in chunks:
+            writer.write(chunk)
+            written += len(chunk)
+
+        for model in models:
+            self.__reset(model, encrypt)
+        return written
+
+    def encrypt_stream(self, reader: BinaryIO, writer: BinaryIO, chunk_size: int = STREAM_CHUNK_SIZE) -> int:
+        """
+        Encrypt everything that can be read from reader and write it to writer. Works with binary files, pipes and
+        sockets (socket.makefile('rwb')). Memory use depends on chunk_size as long as can_stream() is True, models
+        that can't stream or seek hold the whole message. Models that can seek use temporary files, or the reader
+        itself when it is seekable and they are the first model.
+        :param reader: Object with a read(size) method that returns b'' at the end
+        :param writer: Object with a write(data) method
+        :param chunk_size: Amount of bytes read at once
+        :return: Amount of bytes written
+        """
+        return self.__hidden_stream(reader, writer, chunk_size, encrypt=True)
+
+    def decrypt_stream(self, reader: BinaryIO, writer: BinaryIO, chunk_size: int = STREAM_CHUNK_SIZE) -> int:
+        """
+        Decrypt everything that can be read from reader and write it to writer, see encrypt_stream()
+        :param reader: Object with a read(size) method that returns b'' at the end
+        :param writer: Object with a write(data) method
+        :param chunk_size: Amount of bytes read at once
+        :return: Amount of bytes written
+        """
+        return self.__hidden_stream(reader, writer, chunk_size, encrypt=False)
+
+    @staticmethod
+    def __present_chars(memory: mmap.mmap, chunk_size: int) -> bytes:
+        """
+        Find the chars that are in the mapped file
+        :param memory: The mapped file
+        :param chunk_size: Amount of bytes read at once
+        :return: Every char that is at least once in the file
+        """
+        # Deleting the chars of every part from all chars leaves the ones that aren't in the file
+        absent = ALL_CHARS
+        for start in range(0, len(memory), chunk_size):
+            absent = absent.translate(None, memory[start:start + chunk_size])
+            if not absent:
+                break
+        return ALL_CHARS.translate(None, absent)
+
+    def __check_chars(self, memory: mmap.mmap, models: List[baseModel], order: List[int], chunk_size: int,
+                      encrypt: bool) -> bool:
+        """
+        Raise a ValueError before anything is written if the file has a char the first model doesn't accept. The
+        chars are followed through the other models as far as their output is known (see baseModel.output_chars)
+        :param memory: The mapped file
+        :param models: The models
+        :param order: Indexes of the models in the order they are run
+        :param chunk_size: Amount of bytes checked at once
+        :param encrypt: If the models encrypt or decrypt
+        :return: If every model is known to accept the chars it gets
+        """
+        chars = self.__present_chars(memory, chunk_size)
+        for position, index in enumerate(order):
+            model = models[index]
+            accepted = model.accepted_chars(encrypt)
+            if accepted is not None and chars.translate(None, accepted):
+                if position:
+                    return False
+
+                outside_chars = chars.translate(None, accepted)
+                offset = min(memory.find(bytes([char])) for char in outside_chars)
+                raise ValueError(f"Given character '{memory[offset]}' at offset {offset} "
+                                 f"is not accepted by model '{model.name}'")
+
+            chars = model.output_chars(chars, encrypt)
+            if chars is None:
+                return all(models[later].accepted_chars(encrypt) is None for later in order[position + 1:])
+        return True
+
+    def __hidden_inplace(self, file: Union[str, os.PathLike, BinaryIO], chunk_size: int, encrypt: bool) -> int:
+        models = self.compile()
+        for model in models:
+            if not model.preserves_length():
+                raise TypeError(f"Model '{model.name}' doesn't preserve the length, files can't be changed in place")
+
+        order = list(range(len(models)))
+        if not encrypt:
+            order.reverse()
+
+        if isinstance(file, (str, os.PathLike)):
+            with open(file, 'r+b') as opened_file:
+                return self.__hidden_inplace(opened_file, chunk_size, encrypt)
+
+        file.flush()
+        length = os.fstat(file.fileno()).st_size
+        try:
+            if length:
+                self.__hidden_inplace_memory(file, length, models, order, chunk_size, encrypt)
+        finally:
+            for model in models:
+                self.__reset(model, encrypt)
+        return length
+
+    def __hidden_inplace_memory(self, file: BinaryIO, length: int, models: List[baseModel], order: List[int],
+                                chunk_size: int, encrypt: bool) -> None:
+        with mmap.mmap(file.fileno(), 0) as memory:
+            if self.__check_chars(memory, models, order, chunk_size, encrypt):
+                self.__hidden_inplace_stages(memory, length, models, order, chunk_size, encrypt)
+                memory.flush()
+                return
+
+            # A later model could still reject a char, so the file is restored from a copy when anything fails
+            with TemporaryFile() as backup:
+                for start in range(0, length, chunk_size):
+                    backup.write(memory[start:start + chunk_size])
+                try:
+                    self.__hidden_inplace_stages(memory, length, models, order, chunk_size, encrypt)
+                except BaseException:
+                    backup.seek(0)
+                    for start in range(0, length, chunk_size):
+                        memory[start:start + chunk_size] = backup.read(chunk_size)
+                    raise
+                finally:
+                    memory.flush()
+
+    def __hidden_inplace_stages(self, memory: mmap.mmap, length: int, models: List[baseModel], order: List[int],
+                                chunk_size: int, encrypt: bool) -> None:
+        for chunked, indexes in split_stages(models, order):
+            if not chunked:
+                # Models that need the whole message get a copy of it
+                memory[:] = self.__hidden_encrypt(bytearray(memory), models[indexes[0]], encrypt)
+                continue
+
+            # Every part goes through all models of the stage while it is in memory
+            alignment = lcm(*[models[index].chunk_alignment() for index in indexes])
+            size = max(chunk_size // alignment, 1) * alignment
+            for start in range(0, length, size):
+                stop = min(start + size, length)
+                content = bytearray(memory[start:stop])
+                for index in indexes:
+                    if encrypt:
+                        content = models[index].encrypt_chunk(content, start, length)
+                    else:
+                        content = models[index].decrypt_chunk(content, start, length)
+                memory[start:stop] = content
+
+    def encrypt_inplace(self, file: Union[str, os.PathLike, BinaryIO], chunk_size: int = STREAM_CHUNK_SIZE) -> int:
+        """
+        Encrypt a file in place by memory mapping it. Only possible when every model preserves the length (see
+        baseModel.preserves_length). Models that can be split (see baseModel.chunk_alignment) change the mapped file
+        per part of chunk_size bytes, the others get a copy of the whole file. Chars the first model doesn't accept
+        (see baseModel.accepted_chars) raise a ValueError before the file is changed. When it isn't known that the
+        later models accept their chars (see baseModel.output_chars), the file is first copied to a temporary file
+        and restored from it when a model raises.
+        :param file: Path of the file or a file opened with 'r+b'
+        :param chunk_size: Size of the parts
+        :return: Length of the file
+        """
+        return self.__hidden_inplace(file, chunk_size, encrypt=True)
+
+    def decrypt_inplace(self, file: Union[str, os.PathLike, BinaryIO], chunk_size: int = STREAM_CHUNK_SIZE) -> int:
+        """
+        Decrypt a file in place by memory mapping it, see encrypt_inplace()
+        :param file: Path of the file or a file opened with 'r+b'
+        :param chunk_size: Size of the parts
+        :return: Length of the file
+        """
+        return self.__hidden_inplace(file, chunk_size, encrypt=False)
+
     def __repr__(self) -> str:
         model_info = [model.__repr__() for model in self.models]
         return "Encrypter object containing:\n" \
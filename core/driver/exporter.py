@@ -1,8 +1,12 @@
 # Library's
 import os
 import json
+import mmap
+import tempfile
 import importlib
-from typing import List
+from hashlib import sha256
+from enum import Enum
+from typing import List, Tuple
 from datetime import datetime
 from dataclasses import field, InitVar, KW_ONLY
 
@@ -11,6 +15,25 @@ from core.driver.encoder import *
 from core.driver.exception import *
 from core.driver.basemodel import base
 from core.driver.encrypter import encrypter
+from core.driver import binary
+
+
+# Version of the compiled caches, change this when the tables of a model are built differently
+CACHE_VERSION = 3
+
+# Extension of the compiled caches, the name is the hash of the encrypter file
+CACHE_SUFFIX = '.cache'
+
+# Default amount of caches kept in a cache directory, the least recently used ones are removed
+CACHE_LIMIT = 64
+
+
+class exportFormat(Enum):
+    """
+    Format of an encrypter file, import_encrypter() detects it
+    """
+    json = 0
+    binary = 1
 
 
 def file_valid(path: Union[str, None]) -> bool:
@@ -23,21 +46,27 @@ def file_valid(path: Union[str, None]) -> bool:
 
 @dataclass
 class exporter:
+    """
+    Exports and imports encrypters to and from files. Types are found through the manifest of the registry
+    (see registry.TYPE_MODULES) and only imported when a file uses them. The helper_dir and model_dir are only walked
+    when auto_add_models is set, for types that aren't in the manifest
+    """
     save_dir: str
-    helper_dir: InitVar[str]
-    model_dir: InitVar[str]
+    helper_dir: InitVar[Union[str, None]] = None
+    model_dir: InitVar[Union[str, None]] = None
 
     file: str = field(default=None, init=False)
 
     _paths: List[str] = field(init=False, default_factory=list, repr=False)
     _model_info: Dict[str, Any] = field(init=False, default_factory=dict)
-    _home_path: str = field(init=False, default=os.environ['PYTHONPATH'].split(os.pathsep)[0])
+    _home_path: str = field(init=False, default=(os.environ.get('PYTHONPATH') or os.getcwd()).split(os.pathsep)[0])
     _ = KW_ONLY
-    auto_add_models: InitVar[bool] = field(default=True)
-    auto_import_models: InitVar[bool] = field(default=True)
+    auto_add_models: InitVar[bool] = field(default=False)
+    auto_import_models: InitVar[bool] = field(default=False)
 
-    def __post_init__(self, helper_dir: str, model_dir: str, auto_add_models: bool, auto_import_models: bool):
-        if auto_add_models:
+    def __post_init__(self, helper_dir: Union[str, None], model_dir: Union[str, None], auto_add_models: bool,
+                      auto_import_models: bool):
+        if auto_add_models and helper_dir is not None and model_dir is not None:
             helper_paths = self.get_all_files_from_dir(os.path.join(self._home_path, helper_dir))
             model_paths = self.get_all_files_from_dir(os.path.join(self._home_path, model_dir))
             self.add_files(*helper_paths, *model_paths)
@@ -101,37 +130,167 @@ class exporter:
     def get_file_path(self) -> str:
         return self.file
 
-    def export_encrypter(self, obj: encrypter) -> bool:
+    def export_encrypter(self, obj: encrypter, file_format: exportFormat = exportFormat.json,
+                         tables: bool = False) -> bool:
+        """
+        Export an encrypter to the file
+        :param obj: The encrypter
+        :param file_format: Readable JSON or the compact binary format
+        :param tables: Store the precomputed tables of the models, so they aren't computed again when imported.
+                       Only possible with the binary format
+        :return: If succeeded
+        """
+        if tables and file_format != exportFormat.binary:
+            raise ValueError("Tables can only be stored in the binary format")
+
         try:
             file_valid(self.file)
         except FileError:
             with open(self.file, 'wb'):
                 os.utime(self.file, None)
 
-        serializable_model = [export_model(model) for model in obj.models]
+        # Every distinct helper is exported once, the models refer to it
+        helpers = helperTable()
+        serializable_model = export_models(obj.models, tables, helpers)
+
+        if file_format == exportFormat.binary:
+            with open(self.file, 'wb') as f:
+                f.write(binary.dumps([datetime.now().isoformat(), serializable_model, helpers.records], tables))
+            return True
 
         export = {
             'date': datetime.now().isoformat(),
-            'models': serializable_model
+            'models': serializable_model,
+            'helpers': helpers.records
         }
 
         with open(self.file, 'w') as f:
             json.dump(export, f, indent=2)
         return True
 
-    def import_encrypter(self) -> encrypter:
-        file_valid(self.file)
+    def __read_models(self, data: bytes) -> Tuple[List[Any], Union[List[Any], None]]:
+        """
+        Read the exported models of a file in either format
+        :param data: Content of the file
+        :return: Exported models and the helper table, files without helper table give None
+        """
+        if binary.is_binary(data):
+            with raise_error(ValueError, FileError(self.file, 'Is not a valid binary encrypter file')):
+                _, models, *helpers = binary.loads(data)
+            return models, helpers[0] if helpers else None
 
-        with open(self.file, 'r') as f:
-            serializable_model = json.load(f)
+        serializable_model = json.loads(data)
 
         with raise_error(KeyError, FileError(self.file, 'Is not an encrypter file')):
-            models = serializable_model['models']
+            return serializable_model['models'], serializable_model.get('helpers')
 
+    @staticmethod
+    def __import_models(models: List[Any], helpers: Union[List[Any], None]) -> encrypter:
         obj = encrypter()
-        for model in models:
-            obj.addModel(import_model(model))
+        for model in import_models(models, helpers):
+            obj.addModel(model)
+        return obj
+
+    def __load_cache(self, cache_path: str, file_hash: str) -> encrypter:
+        """
+        Load an encrypter from a compiled cache. The cache is memory mapped, the models use the tables of its table
+        section as views on the mapping instead of scrambling and fusing again. So processes that load the same cache
+        share its pages, the mapping is closed when the last table is no longer used
+        :param cache_path: Path of the cache
+        :param file_hash: Hash of the encrypter file the cache has to belong to
+        :return: The encrypter with its plan compiled
+        """
+        with open(cache_path, 'rb') as f:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        version, cached_hash, models, fused_tables, helpers = binary.loads(mapping)
+
+        if version != CACHE_VERSION or cached_hash != file_hash:
+            raise ValueError("Cache is stale")
+
+        # The modification time tells which caches have been used least recently, see __prune_cache()
+        try:
+            os.utime(cache_path)
+        except OSError:
+            pass
+
+        obj = self.__import_models(models, helpers)
+        obj.compile(fused_tables)
         return obj
 
+    def __save_cache(self, obj: encrypter, cache_path: str, file_hash: str) -> bool:
+        """
+        Save the compiled cache of an encrypter, readers never see a partly written cache
+        :param obj: The encrypter
+        :param cache_path: Path of the cache
+        :param file_hash: Hash of the encrypter file
+        :return: If the cache could be written
+        """
+        helpers = helperTable()
+        models = export_models(obj.models, True, helpers)
+        fused_tables = [[export_table(table) for table in tables] for tables in obj.compiled_tables()]
+        document = [CACHE_VERSION, file_hash, models, fused_tables, helpers.records]
 
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            handle, temp_path = tempfile.mkstemp(dir=os.path.dirname(cache_path), suffix='.tmp')
+        except OSError:
+            return False
+
+        try:
+            with os.fdopen(handle, 'wb') as f:
+                f.write(binary.dumps(document, tables=True))
+            os.replace(temp_path, cache_path)
+        except OSError:
+            os.remove(temp_path)
+            return False
+        return True
+
+    @staticmethod
+    def __prune_cache(cache_dir: str, cache_limit: int) -> None:
+        """
+        Remove the least recently used caches of a directory, caches of changed encrypter files are never used again
+        :param cache_dir: Directory of compiled caches
+        :param cache_limit: Amount of caches that are kept
+        """
+        try:
+            caches = [entry for entry in os.scandir(cache_dir) if entry.name.endswith(CACHE_SUFFIX)]
+            caches.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+        except OSError:
+            return
+
+        for entry in caches[cache_limit:]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+    def import_encrypter(self, cache_dir: Union[str, None] = None, cache_limit: int = CACHE_LIMIT) -> encrypter:
+        """
+        Import the encrypter of the file
+        :param cache_dir: Directory of compiled caches. If given, the encrypter is loaded from the cache of the file,
+                          which holds the tables of the models so nothing is scrambled or fused again. Missing, stale
+                          or damaged caches are built again
+        :param cache_limit: Amount of caches kept in cache_dir, the least recently used ones are removed when a cache
+                            is built
+        :return: The encrypter
+        """
+        file_valid(self.file)
+
+        with open(self.file, 'rb') as f:
+            data = f.read()
+
+        if cache_dir is None:
+            return self.__import_models(*self.__read_models(data))
+
+        file_hash = sha256(data).hexdigest()
+        cache_path = os.path.join(cache_dir, file_hash + CACHE_SUFFIX)
+        try:
+            return self.__load_cache(cache_path, file_hash)
+        except (OSError, ValueError, TypeError, KeyError, IndexError):
+            pass
+
+        obj = self.__import_models(*self.__read_models(data))
+        if self.__save_cache(obj, cache_path, file_hash):
+            self.__prune_cache(cache_dir, cache_limit)
+        return obj
 
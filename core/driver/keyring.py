@@ -0,0 +1,459 @@
+# Library's
+import os
+import struct
+import tempfile
+from datetime import datetime
+from contextlib import contextmanager
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import List, Dict, Tuple, Union, Iterator, BinaryIO
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Drivers
+from core.driver import binary
+from core.driver.exception import FileError, raise_error
+from core.driver.encoder import export_models, import_models, helperTable
+from core.driver.encrypter import encrypter
+
+# Magic and version at the start of a keyring file, version 2 adds the delta footers
+KEYRING_HEADER = struct.Struct('<4sH')
+KEYRING_MAGIC = b'ENCK'
+KEYRING_VERSION = 2
+
+# Magic, offset and length of the index or delta that precedes the footer
+KEYRING_FOOTER = struct.Struct('<4sQQ')
+KEYRING_FOOTER_MAGIC = b'ENCI'
+KEYRING_DELTA_MAGIC = b'ENCD'
+
+# Amount of deltas after which a full index is written again, this bounds the footers read to find the index
+KEYRING_CHECKPOINT_INTERVAL = 64
+
+# The file is compacted once the replaced records, removed records and old indexes take more bytes than this and
+# more bytes than the current records
+KEYRING_COMPACT_SIZE = 1 << 20
+
+# Amount of bytes read at once when looking for an earlier footer
+KEYRING_SCAN_SIZE = 1 << 16
+
+# Default amount of encrypters kept in memory
+KEYRING_CACHE_SIZE = 128
+
+
+@dataclass
+class keyringStatistics:
+    """
+    Statistics of the loaded encrypters of a keyring
+    """
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+
+@dataclass
+class keyring:
+    """
+    File with many named encrypters. Every encrypter is a record in the binary format (see binary.py). Adding,
+    replacing or removing an encrypter appends its record and a delta with the offset and length of the record (or
+    a tombstone) after the last footer, followed by a footer that points to the delta and the footer before it.
+    Every KEYRING_CHECKPOINT_INTERVAL changes a full index of all names is written instead of a delta. Earlier
+    records stay until compact() is called, which happens by itself once they take too much space (see
+    KEYRING_COMPACT_SIZE). The footer is written last, so an interrupted write leaves the previous footer as the
+    last valid one. Getting an encrypter only reads the index and its own record. The most recently used encrypters
+    are kept in memory.
+
+    Many keyring objects (also in other processes) can use the same file. Changes lock the file and merge with the
+    current index of the file, every keyring reads the index again once the file has changed. Locking needs fcntl,
+    without it only one keyring should change the file at a time.
+    """
+    path: str
+    cache_size: int = field(default=KEYRING_CACHE_SIZE)
+
+    statistics: keyringStatistics = field(default_factory=keyringStatistics, init=False)
+
+    # Offset and length of the record of every name
+    __index: Dict[str, Tuple[int, int]] = field(default_factory=dict, init=False, repr=False)
+    # Position of the footer the index was read from and the amount of deltas since its last full index
+    __footer: Tuple[int, int] = field(default=(0, 0), init=False, repr=False)
+    # Inode, size and modification time of the file when the index was read
+    __stamp: Union[Tuple[int, int, int], None] = field(default=None, init=False, repr=False)
+    # Offset and length of the record and the encrypter of every loaded name
+    __cache: 'OrderedDict[str, Tuple[Tuple[int, int], encrypter]]' = field(
+        default_factory=OrderedDict, init=False, repr=False
+    )
+
+    def __post_init__(self):
+        if self.cache_size < 1:
+            raise ValueError("cache_size should be at least 1")
+
+        if not os.path.exists(self.path):
+            self.__create()
+        self.__refresh()
+
+    def __create(self) -> None:
+        """
+        Create an empty keyring file. It is written next to the path and linked to it once it is complete, so
+        keyrings that open it at the same time never see it unfinished and one of them makes it
+        """
+        handle, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.path)))
+        try:
+            with os.fdopen(handle, 'wb') as f:
+                f.write(KEYRING_HEADER.pack(KEYRING_MAGIC, KEYRING_VERSION))
+                self.__write_footer(f, KEYRING_FOOTER_MAGIC, [], KEYRING_HEADER.size)
+
+            try:
+                os.link(temp_path, self.path)
+            except FileExistsError:
+                pass
+            except OSError:
+                # The file system has no hard links, move the file unless another keyring has made it already
+                if not os.path.exists(self.path):
+                    os.replace(temp_path, self.path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    @staticmethod
+    def __stamp_of(stat: os.stat_result) -> Tuple[int, int, int]:
+        return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+    @contextmanager
+    def __locked(self, exclusive: bool) -> Iterator[BinaryIO]:
+        """
+        Open the file and lock it, shared for reading or exclusive for changing it
+        :param exclusive: If the file is changed
+        :return: The opened file, the lock is released when it is closed
+        """
+        while True:
+            f = open(self.path, 'r+b' if exclusive else 'rb')
+            try:
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+
+                # compact() replaces the file, a lock on the replaced file is taken again on the new one
+                if os.fstat(f.fileno()).st_ino == os.stat(self.path).st_ino:
+                    break
+            except BaseException:
+                f.close()
+                raise
+            f.close()
+
+        with f:
+            yield f
+
+    def __read_footer(self, f: BinaryIO, position: int) -> Union[Tuple[bytes, List], None]:
+        """
+        Read the index or delta of the footer at the given position
+        :param f: The file
+        :param position: Position of the footer
+        :return: Magic of the footer and its values, None if it isn't a valid footer
+        """
+        f.seek(position)
+        magic, offset, length = KEYRING_FOOTER.unpack(f.read(KEYRING_FOOTER.size))
+        if magic not in (KEYRING_FOOTER_MAGIC, KEYRING_DELTA_MAGIC) or offset < KEYRING_HEADER.size or \
+                offset + length != position:
+            return None
+
+        f.seek(offset)
+        try:
+            values = binary.loads(f.read(length))
+        except (ValueError, TypeError):
+            return None
+
+        # A delta holds the position of the previous footer, the amount of deltas since the last full index, the
+        # name and the offset and length of its record (None for a removed name)
+        if magic == KEYRING_DELTA_MAGIC and (len(values) != 5 or not KEYRING_HEADER.size <= values[0] < offset):
+            return None
+        return magic, values
+
+    @staticmethod
+    def __previous_footer(f: BinaryIO, position: int) -> int:
+        """
+        Find the last footer magic that starts before the given position
+        :param f: The file
+        :param position: Position to search back from
+        :return: Position of the magic, -1 if there is none
+        """
+        end = position + len(KEYRING_FOOTER_MAGIC) - 1
+        while end - KEYRING_HEADER.size >= len(KEYRING_FOOTER_MAGIC):
+            start = max(end - KEYRING_SCAN_SIZE, KEYRING_HEADER.size)
+            f.seek(start)
+            data = f.read(end - start)
+            found = max(data.rfind(KEYRING_FOOTER_MAGIC), data.rfind(KEYRING_DELTA_MAGIC))
+            if found >= 0:
+                return start + found
+            # Blocks overlap, so a magic on the border of two blocks is found
+            end = start + len(KEYRING_FOOTER_MAGIC) - 1
+        return -1
+
+    def __last_footer(self, f: BinaryIO) -> Tuple[int, Tuple[bytes, List]]:
+        """
+        Find the last valid footer
+        :param f: The file
+        :return: Position of the footer, its magic and its values
+        """
+        f.seek(0)
+        magic, version = KEYRING_HEADER.unpack(f.read(KEYRING_HEADER.size).ljust(KEYRING_HEADER.size, b'\0'))
+        if magic != KEYRING_MAGIC:
+            raise FileError(self.path, 'Is not a keyring file')
+        if version > KEYRING_VERSION:
+            raise FileError(self.path, f'Keyring version {version} is not supported')
+
+        # A write that has been interrupted leaves a damaged footer (or none) at the end, the one before it is used
+        end = f.seek(0, os.SEEK_END)
+        position = end - KEYRING_FOOTER.size
+        if position >= KEYRING_HEADER.size and (footer := self.__read_footer(f, position)) is not None:
+            return position, footer
+
+        position = self.__previous_footer(f, min(position, end))
+        while position >= 0:
+            if position + KEYRING_FOOTER.size <= end and (footer := self.__read_footer(f, position)) is not None:
+                return position, footer
+            position = self.__previous_footer(f, position)
+        raise FileError(self.path, 'Keyring has no valid index')
+
+    def __read_index(self, f: BinaryIO, known: bool) -> Tuple[Dict[str, Tuple[int, int]], Tuple[int, int]]:
+        """
+        Read the index of the last valid footer. The deltas are followed back to a full index, or to the footer the
+        current index was read from
+        :param f: The file
+        :param known: If the current index was read from this file, so only the deltas after its footer are read
+        :return: Offset and length of the record of every name, position of the footer and the amount of deltas
+                 since the last full index
+        """
+        last_position, footer = self.__last_footer(f)
+
+        position = last_position
+        deltas = []
+        while not (known and position == self.__footer[0]):
+            if footer is None:
+                raise FileError(self.path, 'Keyring has a damaged delta')
+
+            magic, values = footer
+            if magic == KEYRING_FOOTER_MAGIC:
+                index = {name: (record_offset, record_length) for name, record_offset, record_length in values}
+                break
+            deltas.append(values)
+            position = values[0]
+            footer = self.__read_footer(f, position)
+        else:
+            index = dict(self.__index)
+
+        for _, _, name, record_offset, record_length in reversed(deltas):
+            if record_offset is None:
+                index.pop(name, None)
+            else:
+                index[name] = (record_offset, record_length)
+
+        if deltas:
+            count = deltas[0][1]
+        else:
+            count = self.__footer[1] if known and last_position == self.__footer[0] else 0
+        return index, (last_position, count)
+
+    def __sync(self, f: BinaryIO) -> None:
+        """
+        Read the index again if the file has changed since it was read
+        :param f: The file, locked
+        """
+        stamp = self.__stamp_of(os.fstat(f.fileno()))
+        if stamp != self.__stamp:
+            # compact() makes a new file, the deltas after the footer of the index only exist in the same file
+            known = self.__stamp is not None and stamp[0] == self.__stamp[0]
+            self.__index, self.__footer = self.__read_index(f, known)
+            self.__stamp = stamp
+
+    def __refresh(self) -> None:
+        if self.__stamp_of(os.stat(self.path)) != self.__stamp:
+            with self.__locked(exclusive=False) as f:
+                self.__sync(f)
+
+    @staticmethod
+    def __write_footer(f: BinaryIO, magic: bytes, values: List, offset: int) -> int:
+        """
+        Write an index or delta and its footer at the given offset of the file
+        :param f: The file, opened for writing
+        :param magic: Magic of the footer, KEYRING_FOOTER_MAGIC for an index and KEYRING_DELTA_MAGIC for a delta
+        :param values: Values of the index or delta
+        :param offset: Offset of the index or delta, after the last record
+        :return: Position of the footer
+        """
+        entries = binary.dumps(values)
+
+        f.seek(offset)
+        f.write(entries)
+        f.flush()
+        os.fsync(f.fileno())
+
+        # The records and the index are on disk before the footer that points to them
+        f.write(KEYRING_FOOTER.pack(magic, offset, len(entries)))
+        f.flush()
+        os.fsync(f.fileno())
+        return offset + len(entries)
+
+    def __append(self, record: Union[bytes, None], name: str) -> bool:
+        """
+        Add, replace or remove the record of a name
+        :param record: The record, None to remove the name
+        :param name: Name of the encrypter
+        :return: If the keyring has changed
+        """
+        with self.__locked(exclusive=True) as f:
+            # Changes of other keyrings since the index was read are kept
+            self.__sync(f)
+            if record is None and name not in self.__index:
+                return False
+
+            f.seek(0)
+            _, version = KEYRING_HEADER.unpack(f.read(KEYRING_HEADER.size))
+            if version < KEYRING_VERSION:
+                # Keyrings of an earlier version would skip the deltas, so they aren't allowed to read the file
+                f.seek(0)
+                f.write(KEYRING_HEADER.pack(KEYRING_MAGIC, KEYRING_VERSION))
+
+            index = dict(self.__index)
+            location = None
+            offset = f.seek(0, os.SEEK_END)
+            if record is None:
+                del index[name]
+            else:
+                f.write(record)
+                location = index[name] = (offset, len(record))
+                offset += len(record)
+
+            previous, count = self.__footer
+            if count + 1 >= KEYRING_CHECKPOINT_INTERVAL:
+                entries = [[entry_name, *entry] for entry_name, entry in index.items()]
+                footer = (self.__write_footer(f, KEYRING_FOOTER_MAGIC, entries, offset), 0)
+            else:
+                delta = [previous, count + 1, name, *(location if location is not None else (None, None))]
+                footer = (self.__write_footer(f, KEYRING_DELTA_MAGIC, delta, offset), count + 1)
+
+            self.__index = index
+            self.__footer = footer
+            self.__stamp = self.__stamp_of(os.fstat(f.fileno()))
+
+            # Everything but the header and the current records is stale
+            stale = self.__stamp[1] - KEYRING_HEADER.size - sum(length for _, length in index.values())
+
+        if stale > max(KEYRING_COMPACT_SIZE, self.__stamp[1] - stale):
+            self.compact()
+        return True
+
+    def names(self) -> List[str]:
+        self.__refresh()
+        return list(self.__index)
+
+    def __contains__(self, name: str) -> bool:
+        self.__refresh()
+        return name in self.__index
+
+    def __len__(self) -> int:
+        self.__refresh()
+        return len(self.__index)
+
+    def add(self, name: str, obj: encrypter, tables: bool = False) -> bool:
+        """
+        Add an encrypter, or replace the encrypter with the same name
+        :param name: Name of the encrypter
+        :param obj: The encrypter
+        :param tables: Store the precomputed tables of the models, see exporter.export_encrypter()
+        :return: If succeeded
+        """
+        helpers = helperTable()
+        models = export_models(obj.models, tables, helpers)
+        record = binary.dumps([datetime.now().isoformat(), models, helpers.records], tables)
+        self.__append(record, name)
+        self.__cache.pop(name, None)
+        return True
+
+    def remove(self, name: str) -> bool:
+        """
+        Remove an encrypter
+        :param name: Name of the encrypter
+        :return: If the encrypter was in the keyring
+        """
+        self.__cache.pop(name, None)
+        return self.__append(None, name)
+
+    def get(self, name: str) -> encrypter:
+        """
+        Get an encrypter, from memory if it has been used recently and its record hasn't changed
+        :param name: Name of the encrypter
+        :return: The encrypter
+        """
+        self.__refresh()
+        if name in self.__cache and self.__cache[name][0] == self.__index.get(name):
+            self.statistics.hits += 1
+            self.__cache.move_to_end(name)
+            return self.__cache[name][1]
+
+        self.statistics.misses += 1
+        self.__cache.pop(name, None)
+        with self.__locked(exclusive=False) as f:
+            self.__sync(f)
+            try:
+                offset, length = self.__index[name]
+            except KeyError:
+                raise KeyError(f"Keyring has no encrypter named '{name}'")
+
+            f.seek(offset)
+            record = f.read(length)
+
+        with raise_error(ValueError, FileError(self.path, f"Record of '{name}' is damaged")):
+            _, models, *helpers = binary.loads(record)
+
+        obj = encrypter()
+        for model in import_models(models, helpers[0] if helpers else None):
+            obj.addModel(model)
+
+        self.__cache[name] = ((offset, length), obj)
+        if len(self.__cache) > self.cache_size:
+            self.__cache.popitem(last=False)
+            self.statistics.evictions += 1
+        return obj
+
+    def clear_cache(self) -> None:
+        self.__cache.clear()
+
+    def compact(self) -> bool:
+        """
+        Rewrite the file without the records that have been replaced or removed and without the earlier indexes and
+        deltas
+        :return: If succeeded
+        """
+        with self.__locked(exclusive=True) as source:
+            self.__sync(source)
+            old_index = self.__index
+
+            handle, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.path)))
+            try:
+                with os.fdopen(handle, 'w+b') as target:
+                    target.write(KEYRING_HEADER.pack(KEYRING_MAGIC, KEYRING_VERSION))
+
+                    index = dict()
+                    for name, (offset, length) in old_index.items():
+                        source.seek(offset)
+                        index[name] = (target.tell(), length)
+                        target.write(source.read(length))
+
+                    entries = [[name, *entry] for name, entry in index.items()]
+                    footer = self.__write_footer(target, KEYRING_FOOTER_MAGIC, entries, target.tell())
+                os.replace(temp_path, self.path)
+            except BaseException:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                raise
+
+            self.__index = index
+            self.__footer = (footer, 0)
+            self.__stamp = self.__stamp_of(os.stat(self.path))
+
+        # The records haven't changed, so the loaded encrypters stay valid at their new offsets
+        for name, (location, obj) in self.__cache.items():
+            if old_index.get(name) == location:
+                self.__cache[name] = (index[name], obj)
+        return True
@@ -0,0 +1,198 @@
+# Library's
+from math import lcm
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from typing import List, Tuple, Callable, Union, Any
+
+# Drivers
+from core.driver.basemodel import baseModel
+
+# Default size of the parts of the message that are given to the worker processes
+CHUNK_SIZE = 1 << 20
+
+# Default amount of messages per batch given to the worker processes by run_many()
+BATCH_SIZE = 256
+
+# Models of a worker process, set by init_worker()
+worker_models: List[baseModel] = list()
+
+# Encrypter of a worker process, set by init_batch_worker()
+worker_encrypter: Any = None
+
+
+def is_chunkable(model: baseModel) -> bool:
+    """
+    Check if a model can encrypt parts of a message in different processes
+    :param model: The model
+    :return: If the model can be run on parts of the message
+    """
+    return model.preserves_length() and model.chunk_alignment() > 0
+
+
+def split_stages(models: List[baseModel], order: List[int]) -> List[Tuple[bool, List[int]]]:
+    """
+    Group the models into stages. Consecutive models that can be chunked share a stage, so the worker processes
+    run a part of the message through all of them at once. Every other model is a stage of its own.
+    :param models: The models
+    :param order: Indexes of the models in the order they are run
+    :return: Per stage if it is chunked and the indexes of its models
+    """
+    stages = []
+    for index in order:
+        chunkable = is_chunkable(models[index])
+        if chunkable and stages and stages[-1][0]:
+            stages[-1][1].append(index)
+        else:
+            stages.append((chunkable, [index]))
+    return stages
+
+
+def init_worker(models: List[baseModel]) -> None:
+    """
+    Initializer of the worker processes, every worker gets its own copy of the models
+    :param models: The models
+    """
+    global worker_models
+    worker_models = models
+
+
+def run_chunk(memory_name: str, start: int, stop: int, length: int, indexes: List[int], encrypt: bool) -> None:
+    """
+    Run a part of the message in shared memory through the given models, the result replaces the part
+    :param memory_name: Name of the shared memory that holds the message
+    :param start: Index of the part in the message
+    :param stop: Index of the end of the part
+    :param length: Length of the whole message
+    :param indexes: Indexes of the models in the order they are run
+    :param encrypt: If the models encrypt or decrypt
+    """
+    memory = SharedMemory(memory_name)
+    try:
+        content = bytearray(memory.buf[start:stop])
+        for index in indexes:
+            model = worker_models[index]
+            if encrypt:
+                content = model.encrypt_chunk(content, start, length)
+            else:
+                content = model.decrypt_chunk(content, start, length)
+        memory.buf[start:stop] = content
+    finally:
+        memory.close()
+
+
+def run_parallel(
+        models: List[baseModel],
+        content: bytearray,
+        encrypt: bool,
+        run_model: Callable[[bytearray, baseModel], bytearray],
+        workers: Union[int, None] = None,
+        chunk_size: int = CHUNK_SIZE
+) -> bytes:
+    """
+    Run a message through the models with a pool of worker processes. The message is kept in shared memory, stages
+    of chunkable models are split over the workers and the other models run on the whole message in this process.
+    :param models: The models, in encryption order
+    :param content: The message
+    :param encrypt: If the models encrypt or decrypt
+    :param run_model: Function that runs the whole message through a model in this process
+    :param workers: Amount of worker processes, defaults to the amount of CPUs
+    :param chunk_size: Size of the parts, rounded to the alignment of the models
+    :return: The encrypted or decrypted message
+    """
+    order = list(range(len(models)))
+    if not encrypt:
+        order.reverse()
+
+    stages = split_stages(models, order)
+    if len(content) <= chunk_size or not any(chunked for chunked, _ in stages):
+        # There is at most one part per stage, so starting the workers would only add to the work
+        for index in order:
+            content = run_model(content, models[index])
+        return bytes(content)
+
+    memory = SharedMemory(create=True, size=max(len(content), 1))
+    try:
+        with ProcessPoolExecutor(workers, initializer=init_worker, initargs=(models,)) as pool:
+            memory.buf[:len(content)] = content
+            length = len(content)
+
+            for chunked, indexes in stages:
+                if not chunked:
+                    new_content = run_model(bytearray(memory.buf[:length]), models[indexes[0]])
+
+                    # Models that change the length get new shared memory
+                    if len(new_content) > memory.size:
+                        memory.close()
+                        memory.unlink()
+                        memory = SharedMemory(create=True, size=len(new_content))
+
+                    length = len(new_content)
+                    memory.buf[:length] = new_content
+                    continue
+
+                alignment = lcm(*[models[index].chunk_alignment() for index in indexes])
+                size = max(chunk_size // alignment, 1) * alignment
+                starts = range(0, length, size)
+                list(pool.map(
+                    run_chunk,
+                    [memory.name] * len(starts),
+                    starts,
+                    [min(start + size, length) for start in starts],
+                    [length] * len(starts),
+                    [indexes] * len(starts),
+                    [encrypt] * len(starts)
+                ))
+
+            return bytes(memory.buf[:length])
+    finally:
+        memory.close()
+        memory.unlink()
+
+
+def init_batch_worker(encrypter: Any) -> None:
+    """
+    Initializer of the worker processes of run_many(), every worker gets its own copy of the encrypter
+    :param encrypter: The encrypter
+    """
+    global worker_encrypter
+    worker_encrypter = encrypter
+
+
+def run_batch(messages: List[bytes], encrypt: bool) -> List[bytes]:
+    """
+    Run a batch of messages through the encrypter of the worker
+    :param messages: The messages
+    :param encrypt: If the messages are encrypted or decrypted
+    :return: The encrypted or decrypted messages
+    """
+    if encrypt:
+        return worker_encrypter.encrypt_many(messages)
+    return worker_encrypter.decrypt_many(messages)
+
+
+def run_many(
+        encrypter: Any,
+        messages: List[bytes],
+        encrypt: bool,
+        workers: Union[int, None] = None,
+        batch_size: int = BATCH_SIZE
+) -> List[bytes]:
+    """
+    Run many messages through an encrypter with a pool of worker processes, every worker gets batches of messages
+    :param encrypter: The encrypter
+    :param messages: The messages
+    :param encrypt: If the messages are encrypted or decrypted
+    :param workers: Amount of worker processes, defaults to the amount of CPUs
+    :param batch_size: Amount of messages per batch
+    :return: The encrypted or decrypted messages, in the same order
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size should be at least 1")
+
+    batches = [messages[start:start + batch_size] for start in range(0, len(messages), batch_size)]
+    with ProcessPoolExecutor(workers, initializer=init_batch_worker, initargs=(encrypter,)) as pool:
+        return [
+            content
+            for batch in pool.map(run_batch, batches, [encrypt] * len(batches))
+            for content in batch
+        ]
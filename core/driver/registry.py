@@ -0,0 +1,49 @@
+# Library's
+import pkgutil
+import importlib
+from typing import Dict, Iterable
+
+# Module of every type that can be exported, by its id (see base.type_id). A module is only imported the first
+# time an id is needed, its MAIN_MODULE is the type. Regenerate with build_manifest() after adding a type
+TYPE_MODULES: Dict[str, str] = {
+    'fiaSGjqZrp-OPfvGrdKzfylVVtY=': 'core.helpers.ascii_scope.ascii',
+    '10jx0lKVdLAEG8fGyz5ugB5gOfM=': 'core.helpers.scrambler.scrambler',
+    'PePY3BT-JpRkpDdR0UY02i2l-ok=': 'core.models.enigma.enigma',
+    'Uk8YXktz_LcVlHBDal-FQHnqie4=': 'core.models.enigma.rotor',
+    'a1xpJjaLo0Mac-Rs0zVen_jMNYM=': 'core.models.shift.shift',
+    '1wKaU76OOaqxgRaGGwKnzN9QyjQ=': 'core.models.swap.swap',
+}
+
+
+def register_type_module(type_id: str, module_name: str) -> bool:
+    """
+    Add a module to the manifest, for types that aren't part of this package
+    :param type_id: Id of the type (see base.type_id)
+    :param module_name: Importable name of the module, with the type as MAIN_MODULE
+    :return: If succeeded
+    """
+    TYPE_MODULES[type_id] = module_name
+    return True
+
+
+def build_manifest(packages: Iterable[str] = ('core.helpers', 'core.models')) -> Dict[str, str]:
+    """
+    Import every module of the given packages and map the id of every MAIN_MODULE to its module.
+    Only needed for regenerating TYPE_MODULES, this imports all types
+    :param packages: Importable names of the packages
+    :return: Module name by type id
+    """
+    manifest = dict()
+    for package_name in packages:
+        package = importlib.import_module(package_name)
+        for module_info in pkgutil.walk_packages(package.__path__, package_name + '.'):
+            if module_info.ispkg or module_info.name.rsplit('.', 1)[-1].startswith('__'):
+                continue
+
+            module = importlib.import_module(module_info.name)
+            try:
+                module_type = module.MAIN_MODULE
+            except AttributeError:
+                continue
+            manifest[module_type.type_id().decode('utf-8')] = module_info.name
+    return manifest
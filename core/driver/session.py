@@ -0,0 +1,131 @@
+# Library's
+from dataclasses import dataclass
+from typing import List, Tuple, Callable
+
+# Drivers
+from core.driver.basemodel import baseModel
+
+
+@dataclass(frozen=True)
+class sessionCheckpoint:
+    """
+    State of an encrypterSession, see encrypterSession.checkpoint()
+    """
+    offsets: Tuple[int, ...]
+    pending: Tuple[bytes, ...]
+    finalized: bool
+
+
+class encrypterSession:
+    """
+    Encrypts or decrypts one message that arrives in fragments. The session keeps the state of every model (the
+    offset in the message and the bytes it can't handle yet), the models themselves aren't changed. So sessions of
+    the same encrypter can run at the same time, and the state can be saved and restored.
+
+    Models that can be split (see baseModel.chunk_alignment) handle every fragment on arrival. A part of a model
+    with an alignment above 1 is handled once another aligned part follows it, so less than two parts are held.
+    Other models hold the whole message until finalize().
+    """
+    def __init__(self, models: List[baseModel], encrypt: bool, run_model: Callable[[bytearray, baseModel], bytearray]):
+        """
+        :param models: The models, in the order they are run
+        :param encrypt: If the models encrypt or decrypt
+        :param run_model: Function that runs the whole message through a model
+        """
+        self.models = models
+        self.encrypt = encrypt
+        self.__run_model = run_model
+
+        self.__offsets: List[int] = [0] * len(models)
+        self.__pending: List[bytearray] = [bytearray() for _ in models]
+        self.__finalized = False
+
+    @staticmethod
+    def is_incremental(model: baseModel) -> bool:
+        """
+        Check if a model handles fragments on arrival
+        :param model: The model
+        :return: If the model doesn't need the whole message
+        """
+        return model.preserves_length() and model.chunk_alignment() > 0
+
+    def __run_stage(self, index: int, content: bytearray, final: bool) -> bytearray:
+        model = self.models[index]
+        pending = self.__pending[index]
+        pending += content
+
+        if not self.is_incremental(model):
+            if not final:
+                return bytearray()
+            content = self.__run_model(bytearray(pending), model)
+            pending.clear()
+            return content
+
+        # Until the end is known, the last aligned part and the bytes after it are held
+        alignment = model.chunk_alignment()
+        if final or alignment == 1:
+            ready = len(pending)
+        else:
+            ready = max(len(pending) // alignment - 1, 0) * alignment
+
+        offset = self.__offsets[index]
+        length = offset + len(pending)
+        part = pending[:ready]
+        del pending[:ready]
+        self.__offsets[index] += ready
+
+        if self.encrypt:
+            return model.encrypt_chunk(part, offset, length)
+        return model.decrypt_chunk(part, offset, length)
+
+    def update(self, fragment: bytes) -> bytes:
+        """
+        Add the next fragment of the message
+        :param fragment: Next bytes of the message
+        :return: Bytes of the output that are known so far, can be empty
+        """
+        if self.__finalized:
+            raise ValueError("Session has been finalized")
+
+        content = bytearray(fragment)
+        for index in range(len(self.models)):
+            content = self.__run_stage(index, content, final=False)
+        return bytes(content)
+
+    def finalize(self) -> bytes:
+        """
+        End the message
+        :return: The rest of the output
+        """
+        if self.__finalized:
+            raise ValueError("Session has been finalized")
+
+        content = bytearray()
+        for index in range(len(self.models)):
+            content = self.__run_stage(index, content, final=True)
+        self.__finalized = True
+        return bytes(content)
+
+    def checkpoint(self) -> sessionCheckpoint:
+        """
+        Save the state of the session. This copies the held bytes, which is little unless a model needs the whole
+        message
+        :return: The state
+        """
+        return sessionCheckpoint(
+            offsets=tuple(self.__offsets),
+            pending=tuple(bytes(pending) for pending in self.__pending),
+            finalized=self.__finalized
+        )
+
+    def restore(self, checkpoint: sessionCheckpoint) -> None:
+        """
+        Go back to a saved state, fragments given after the checkpoint are forgotten
+        :param checkpoint: State of a session of the same encrypter, see checkpoint()
+        """
+        if len(checkpoint.offsets) != len(self.models):
+            raise ValueError("Checkpoint doesn't belong to a session of this encrypter")
+
+        self.__offsets = list(checkpoint.offsets)
+        self.__pending = [bytearray(pending) for pending in checkpoint.pending]
+        self.__finalized = checkpoint.finalized
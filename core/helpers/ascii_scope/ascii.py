@@ -1,10 +1,12 @@
 # Library's
 from enum import Enum
 from typing import List, Any, Union
-from dataclasses import dataclass, field
+from copy import copy
+from dataclasses import dataclass, field, InitVar, KW_ONLY
 
 # Drivers
 from core.driver.basemodel import baseHelper
+from core.driver.encoder import tables_exported, export_table
 
 
 class asciiSetting(Enum):
@@ -31,8 +33,26 @@ class ascii_scope(baseHelper):
 
     # Local variables, will not be exported
     scope: bytearray = field(default_factory=bytearray, init=False)
+    scope_index: List[Union[int, None]] = field(default_factory=list, init=False, repr=False)
+
+    _: KW_ONLY
+    tables: InitVar[Union[List[bytes], None]] = None
+
+    def __post_init__(self, tables: Union[List[bytes], None]):
+        start, stop = self.setting.value
+        if tables is not None:
+            # Precomputed scope (see __export__), used instead of checking every char of the setting. It has to hold
+            # the extra chars and can't hold chars outside of the setting
+            scope = bytes(tables[0])
+            extra_chars = self.extra_scope_chars or b''
+            if set(extra_chars).difference(scope) or scope.translate(None, bytes(range(start, stop + 1)) + extra_chars):
+                raise ValueError("Precomputed tables don't fit the setting")
+
+            self.scope = bytearray(scope)
+            self.update_index()
+            self.update_id()
+            return
 
-    def __post_init__(self):
         if self.setting in (asciiSetting.lettersAll, asciiSetting.lettersLower, asciiSetting.lettersHigher):
             def check_func(char):
                 return char.isalpha()
@@ -46,7 +66,6 @@ class ascii_scope(baseHelper):
             def check_func(_):
                 return True
 
-        start, stop = self.setting.value
         for number in range(start, stop + 1):
             if check_func(chr(number)):
                 self.scope += number.to_bytes(1, 'little')
@@ -54,28 +73,53 @@ class ascii_scope(baseHelper):
         if self.extra_scope_chars is not None:
             self.scope += self.extra_scope_chars
 
+        self.update_index()
         self.update_id()
 
-    def get_index(self, char: bytes) -> Union[bool, int]:
+    def update_index(self) -> None:
+        """
+        Rebuild the reverse lookup table of the scope. Call this every time the scope has been changed
+        """
+        self.scope_index = [None] * 256
+        for index in reversed(range(len(self.scope))):
+            self.scope_index[self.scope[index]] = index
+
+    def get_index(self, char: Union[bytes, int]) -> int:
         try:
-            return self.scope.index(char)
-        except ValueError:
+            index = self.scope_index[char if isinstance(char, int) else ord(char)]
+        except (IndexError, TypeError):
+            index = None
+
+        if index is None:
             raise ValueError(f"Given character '{char}' does not fit the scope '{self.setting}'")
+        return index
 
     @staticmethod
     def __export__(model: 'ascii_scope') -> List[Any]:
-        return [
+        attributes = [
             model.setting.value,
             model.extra_scope_chars.decode('utf-8')
         ]
+        if tables_exported():
+            attributes.append([export_table(model.scope)])
+        return attributes
 
     @staticmethod
     def __import__(attributes: Any) -> 'ascii_scope':
         return ascii_scope(
             setting=asciiSetting(attributes[0]),
-            extra_scope_chars=attributes[1].encode('utf-8')
+            extra_scope_chars=attributes[1].encode('utf-8'),
+            tables=attributes[2] if len(attributes) > 2 else None
         )
 
+    @staticmethod
+    def __share__(model: 'ascii_scope') -> 'ascii_scope':
+        """Magic method for sharing, models can scramble the scope (see shift) so every user gets its own copy"""
+        shared = copy(model)
+        shared.scope = bytearray(model.scope)
+        shared.scope_index = list(model.scope_index)
+        return shared
+
     def __len__(self):
         return len(self.scope)
 
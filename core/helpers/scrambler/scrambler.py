@@ -2,12 +2,21 @@
 import time
 import random
 from enum import Enum
-from typing import List, Any
+from array import array
+from functools import lru_cache
+from typing import List, Any, Tuple
 from dataclasses import dataclass, field
 
 # Drivers
 from core.driver.basemodel import baseHelper
 
+# Amount of permutations kept in memory, shared by all scramblers
+PERMUTATION_CACHE_SIZE = 32
+
+# Longest permutation that is kept in memory, longer ones are made per call. With two arrays of 4 bytes per index,
+# the cache holds at most 16 MiB
+PERMUTATION_CACHE_LENGTH = 1 << 16
+
 
 class scrambleSetting(Enum):
     """
@@ -42,14 +51,69 @@ class scrambler(baseHelper):
 
         self.update_id()
 
+    @staticmethod
+    def __shuffle(seed: int, length: int) -> array:
+        """
+        Shuffle the indexes of data with the given length, the result only depends on the seed and the length
+        :param seed: Seed of the scrambler
+        :param length: Length of the data
+        :return: Index in the data for every scrambled index
+        """
+        # A private generator keeps the global random state untouched and makes this safe to call from threads.
+        # It produces the same shuffle as seeding the global generator did
+        indexes = list(range(length))
+        random.Random(seed).shuffle(indexes)
+        return array('I' if length <= 1 << 32 else 'Q', indexes)
+
+    @staticmethod
+    def __invert(permutation: array) -> array:
+        inverse = array(permutation.typecode, bytes(len(permutation) * permutation.itemsize))
+        for index, source in enumerate(permutation):
+            inverse[source] = index
+        return inverse
+
+    @staticmethod
+    @lru_cache(maxsize=PERMUTATION_CACHE_SIZE)
+    def __cached_permutations(seed: int, length: int) -> Tuple[array, array]:
+        """
+        Cached permutation and inverse of short data (like sections). Don't change the returned arrays, they are
+        shared with every call (and thread) with the same arguments
+        :param seed: Seed of the scrambler
+        :param length: Length of the data, at most PERMUTATION_CACHE_LENGTH
+        :return: Permutation and its inverse
+        """
+        permutation = scrambler.__shuffle(seed, length)
+        return permutation, scrambler.__invert(permutation)
+
+    def permutation(self, length: int) -> array:
+        """
+        Get the permutation scramble() applies to data of the given length
+        :param length: Length of the data
+        :return: Index in the data for every index in the scrambled data (don't change it)
+        """
+        if length <= PERMUTATION_CACHE_LENGTH:
+            return self.__cached_permutations(self.seed, length)[0]
+        return self.__shuffle(self.seed, length)
+
+    def inverse_permutation(self, length: int) -> array:
+        """
+        Get the permutation unscramble() applies to data of the given length
+        :param length: Length of the data
+        :return: Index in the scrambled data for every index in the data (don't change it)
+        """
+        if length <= PERMUTATION_CACHE_LENGTH:
+            return self.__cached_permutations(self.seed, length)[1]
+        return self.__invert(self.__shuffle(self.seed, length))
+
     def scramble(self, unscrambled_array: bytearray) -> bytearray:
         """
         Scramble a given bytearray. This will also scramble the given array!
         :param unscrambled_array: bytearray that needs scrambling
         :return: scrambled bytearray
         """
-        random.seed(self.seed)
-        random.shuffle(unscrambled_array)
+        unscrambled_array[:] = bytearray(
+            map(unscrambled_array.__getitem__, self.permutation(len(unscrambled_array)))
+        )
         return unscrambled_array
 
     def unscramble(self, scrambled_array: bytearray) -> bytearray:
@@ -58,12 +122,7 @@ class scrambler(baseHelper):
         :param scrambled_array: bytearray that needs unscrambling
         :return: unscrambled bytearray
         """
-        range_list = bytearray(range(len(scrambled_array)))
-        shuffled_data = sorted(
-            zip(scrambled_array, self.scramble(range_list)),
-            key=lambda x: x[1]
-        )
-        return bytearray(item[0] for item in shuffled_data)
+        return bytearray(map(scrambled_array.__getitem__, self.inverse_permutation(len(scrambled_array))))
 
     @staticmethod
     def __export__(model: 'scrambler') -> List[Any]:
@@ -79,6 +138,11 @@ class scrambler(baseHelper):
             seed=attributes[0]
         )
 
+    @staticmethod
+    def __share__(model: 'scrambler') -> 'scrambler':
+        """Magic method for sharing, the seed never changes so every user can have the same scrambler"""
+        return model
+
 
 # Standard model variables
 MAIN_MODULE = scrambler
@@ -1,2 +1,2 @@
 from .rotor import enigmaRotor
-from .enigma import enigma
+from .enigma import enigma, enigmaEngine
@@ -1,6 +1,12 @@
 # Library's
+from enum import Enum
 from dataclasses import dataclass, field
-from typing import List, Any
+from typing import List, Any, Tuple
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 # Drivers
 from core.driver.encoder import export_model, import_model
@@ -12,6 +18,22 @@ from core.models.enigma import enigmaRotor
 # Helpers
 from core.helpers.ascii_scope import ascii_scope, asciiSetting
 
+# Messages of at least this length are encrypted with NumPy, if it is installed
+NUMPY_THRESHOLD = 1024
+
+# Amount of chars the NumPy engine handles at once, this bounds the size of the position arrays
+NUMPY_BLOCK_SIZE = 1 << 16
+
+
+class enigmaEngine(Enum):
+    """
+    Engine the enigma model uses for whole messages
+    """
+    auto = 0
+    scalar = 1
+    segment = 2
+    numpy = 3
+
 
 @dataclass
 class enigma(baseModel):
@@ -22,6 +44,10 @@ class enigma(baseModel):
     ascii_scope: 'ascii_scope' = field(default_factory=lambda: ascii_scope(asciiSetting.printable))
     rotors: List[enigmaRotor] = field(default_factory=list)
 
+    # Local variables, will not be exported
+    engine: enigmaEngine = field(default=enigmaEngine.auto, repr=False)
+    __offset: int = field(default=0, init=False, repr=False)
+
     def addRotor(self, rotor: enigmaRotor):
         if not isinstance(rotor, enigmaRotor):
             raise TypeError("Given rotor is not of type 'enigmaRotor'")
@@ -29,10 +55,33 @@ class enigma(baseModel):
         self.rotors.append(rotor)
 
     def advanceRotors(self):
+        self.__offset += 1
         for rotor in reversed(self.rotors):
             if rotor.advanceRotor():
                 break
 
+    def seek(self, offset: int) -> None:
+        """
+        Position the rotors for the char at the given offset of a message, as if all chars before it have been
+        encrypted since the last reset. Every char advances the last rotor, the rotor before it advances as long
+        as the rotor after it doesn't wrap around. So the amount of advances of a rotor is the amount of the rotor
+        after it minus its wraps.
+        :param offset: Amount of chars before the next char
+        """
+        if offset < 0:
+            raise ValueError("offset can't be negative")
+
+        self.__offset = offset
+        for rotor in reversed(self.rotors):
+            offset -= rotor.seekRotor(offset)
+
+    def tell(self) -> int:
+        """
+        Get the offset of the next char
+        :return: Amount of chars encrypted since the last reset or the offset of the last seek
+        """
+        return self.__offset
+
     def __hidden_enigma(self, content: bytes, rotor_func) -> bytes:
         self.advanceRotors()
 
@@ -42,13 +91,196 @@ class enigma(baseModel):
 
         return self.ascii_scope.scope[index].to_bytes(1, 'little')
 
+    def __positions(self, advances: int) -> Tuple[List[int], List[int]]:
+        """
+        Calculate the rotor positions after the given amount of advances since the last reset, the same way as
+        seek() but without changing the rotors
+        :param advances: Amount of advances of the last rotor
+        :return: Position of every rotor and the amount of advances until it wraps around
+        """
+        positions = [0] * len(self.rotors)
+        until_wrap = [0] * len(self.rotors)
+        for rotor_number in reversed(range(len(self.rotors))):
+            rotor = self.rotors[rotor_number]
+            until_wrap[rotor_number] = rotor.advancesUntilWrap(advances)
+            wraps, positions[rotor_number] = rotor.positionAt(advances)
+            advances -= wraps
+        return positions, until_wrap
+
+    def __step(self, positions: List[int], until_wrap: List[int]) -> None:
+        """
+        Move the positions of __positions() to the next char, the same way as advanceRotors()
+        :param positions: Position of every rotor
+        :param until_wrap: Amount of advances until every rotor wraps around
+        """
+        for rotor_number in reversed(range(len(self.rotors))):
+            until_wrap[rotor_number] -= 1
+            if until_wrap[rotor_number]:
+                positions[rotor_number] = (positions[rotor_number] + 1) % self.rotors[rotor_number].rotorSize
+            else:
+                positions[rotor_number] = 0
+                until_wrap[rotor_number] = self.rotors[rotor_number].rotorSize
+                break
+
+    def __rotor_positions(self, offset: int, length: int) -> List['numpy.ndarray']:
+        """
+        Calculate the rotor positions for the chars from the given offset, see __positions()
+        :param offset: Offset of the first char in the message
+        :param length: Amount of chars
+        :return: Positions of every rotor for every char
+        """
+        advances = numpy.arange(offset + 1, offset + length + 1)
+
+        positions = []
+        for rotor in reversed(self.rotors):
+            wraps, rotor_positions = rotor.positionAt(advances)
+            positions.insert(0, rotor_positions)
+            advances = advances - wraps
+        return positions
+
+    def __rotor_order(self) -> List[int]:
+        # The char passes through the rotors from the last to the first and back to the last
+        return list(reversed(range(len(self.rotors)))) + list(range(1, len(self.rotors)))
+
+    def __hidden_enigma_numpy(self, content: bytearray, encrypt: bool, offset: int) -> bytearray:
+        scope = numpy.frombuffer(bytes(self.ascii_scope.scope), dtype=numpy.uint8)
+        scope_index = numpy.array([-1 if index is None else index for index in self.ascii_scope.scope_index])
+        rotor_order = self.__rotor_order()
+
+        new_content = bytearray()
+        for start in range(0, len(content), NUMPY_BLOCK_SIZE):
+            chars = numpy.frombuffer(content[start:start + NUMPY_BLOCK_SIZE], dtype=numpy.uint8)
+
+            indexes = scope_index[chars]
+            outside = indexes < 0
+            if outside.any():
+                # Let the ascii_scope raise the error for the first char outside the scope
+                self.ascii_scope.get_index(int(chars[outside.argmax()]))
+
+            positions = self.__rotor_positions(offset + start, len(chars))
+            for rotor_number in rotor_order:
+                rotor = self.rotors[rotor_number]
+                if encrypt:
+                    indexes = rotor.getPositionArray(positions[rotor_number], indexes)
+                else:
+                    indexes = rotor.getPositionReverseArray(positions[rotor_number], indexes)
+
+            new_content += scope[indexes].tobytes()
+        return new_content
+
+    def __hidden_enigma_segment(self, content: bytearray, encrypt: bool, offset: int) -> bytearray:
+        """
+        Encrypt the content per segment. Rotors can only wrap around on the first char of a segment, after that
+        every rotor advances one position per char until the first one reaches its end. So every rotor pass over a
+        segment is a single map over the rotor instead of a lookup per char.
+        """
+        scope = self.ascii_scope.scope
+        scope_index = self.ascii_scope.scope_index
+        rotor_order = self.__rotor_order()
+
+        # Deleting every char of the scope leaves the chars that don't fit it
+        outside_chars = bytes(content).translate(None, scope)
+        if outside_chars:
+            self.ascii_scope.get_index(outside_chars[0])
+
+        new_content = bytearray()
+        positions, until_wrap = self.__positions(offset + 1)
+        start = 0
+        while start < len(content):
+            length = min(
+                min(rotor.rotorSize - position, rotor_until_wrap)
+                for rotor, position, rotor_until_wrap in zip(self.rotors, positions, until_wrap)
+            )
+            segment = content[start:start + length]
+
+            indexes = map(scope_index.__getitem__, segment)
+            for rotor_number in rotor_order:
+                rotor = self.rotors[rotor_number]
+                if encrypt:
+                    indexes = rotor.getPositionSegment(indexes, positions[rotor_number])
+                else:
+                    indexes = rotor.getPositionReverseSegment(indexes, positions[rotor_number])
+            new_content += bytes(map(scope.__getitem__, indexes))
+            start += len(segment)
+
+            # Every rotor advanced once per char of the segment, the advance to the next char can wrap them around
+            for rotor_number in range(len(self.rotors)):
+                positions[rotor_number] += length - 1
+                until_wrap[rotor_number] -= length - 1
+            self.__step(positions, until_wrap)
+        return new_content
+
+    def __hidden_enigma_buffer(self, content: bytearray, encrypt: bool, offset: int) -> bytearray:
+        """
+        Encrypt the content as if it starts at the given offset of the message. The rotors aren't changed, their
+        positions are calculated from the offset, so this can be called by many threads at once
+        """
+        engine = self.engine
+        if not self.rotors:
+            engine = enigmaEngine.scalar
+        elif engine == enigmaEngine.auto:
+            if numpy is not None and len(content) >= NUMPY_THRESHOLD:
+                engine = enigmaEngine.numpy
+            else:
+                engine = enigmaEngine.segment
+
+        if engine == enigmaEngine.numpy:
+            return self.__hidden_enigma_numpy(content, encrypt, offset)
+        elif engine == enigmaEngine.segment:
+            return self.__hidden_enigma_segment(content, encrypt, offset)
+
+        rotor_funcs = [
+            (rotor_number, self.rotors[rotor_number].getPosition if encrypt else
+             self.rotors[rotor_number].getPositionReverse)
+            for rotor_number in self.__rotor_order()
+        ]
+        get_index = self.ascii_scope.get_index
+        scope = self.ascii_scope.scope
+
+        new_content = bytearray(len(content))
+        positions, until_wrap = self.__positions(offset + 1)
+        for char_offset, char in enumerate(content):
+            index = get_index(char)
+            for rotor_number, rotor_func in rotor_funcs:
+                index = rotor_func(index, positions[rotor_number])
+
+            new_content[char_offset] = scope[index]
+            self.__step(positions, until_wrap)
+        return new_content
+
     def encrypt(self, content: bytes) -> bytes:
         return self.__hidden_enigma(content, lambda rotor, index: rotor.getPosition(index))
 
     def decrypt(self, content: bytes) -> bytes:
         return self.__hidden_enigma(content, lambda rotor, index: rotor.getPositionReverse(index))
 
+    def encrypt_buffer(self, content: bytearray, offset: int = 0) -> bytearray:
+        return self.__hidden_enigma_buffer(content, True, offset)
+
+    def decrypt_buffer(self, content: bytearray, offset: int = 0) -> bytearray:
+        return self.__hidden_enigma_buffer(content, False, offset)
+
+    def preserves_length(self) -> bool:
+        return True
+
+    def chunk_alignment(self) -> int:
+        return 1
+
+    def encrypt_chunk(self, content: bytearray, offset: int, length: int) -> bytearray:
+        return self.__hidden_enigma_buffer(content, True, offset)
+
+    def decrypt_chunk(self, content: bytearray, offset: int, length: int) -> bytearray:
+        return self.__hidden_enigma_buffer(content, False, offset)
+
+    def accepted_chars(self, encrypt: bool) -> bytes:
+        return bytes(self.ascii_scope.scope)
+
+    def output_chars(self, chars: bytes, encrypt: bool) -> bytes:
+        # The rotors can turn any char into any char of the scope
+        return bytes(self.ascii_scope.scope)
+
     def reset(self, after_encryption: bool) -> None:
+        self.__offset = 0
         for rotor in self.rotors:
             rotor.reset()
 
@@ -1,9 +1,15 @@
 # Library's
-from typing import List, Any
-from dataclasses import dataclass, field
+from operator import add, sub
+from typing import List, Any, Iterable, Iterator, Union, Tuple
+from dataclasses import dataclass, field, InitVar, KW_ONLY
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 # Drivers
-from core.driver.encoder import export_model, import_model
+from core.driver.encoder import export_model, import_model, tables_exported, export_table
 from core.driver.basemodel import baseHelper, typeInput
 
 # Helpers
@@ -26,33 +32,128 @@ class enigmaRotor(baseHelper):
     scrambler: 'scrambler' = field(default=None)
 
     rotor: bytearray = field(init=False)
+    rotorReverse: bytearray = field(init=False, repr=False)
 
     __init_rotorPosition: int = field(init=False, repr=False)
+    __firstWrap: int = field(init=False, repr=False)
+    __rotorSegment: bytearray = field(init=False, repr=False)
+    __rotorModulo: bytes = field(init=False, repr=False)
+
+    _: KW_ONLY
+    tables: InitVar[Union[List[bytes], None]] = None
 
-    def __post_init__(self):
+    def __post_init__(self, tables: Union[List[bytes], None]):
         # Update the id when the object constructor is called
         self.update_id()
 
-        self.rotor = bytearray(range(self.rotorSize))
-
-        if isinstance(self.scrambler, scrambler):
-            self.rotor = self.scrambler.scramble(self.rotor)
-        elif self.scrambler is not None:
-            raise AttributeError(f"given scrambler is of unknown type '{type(self.scrambler)}'")
-
-        if self.rotorOffset != 0:
-            if abs(self.rotorOffset) > self.rotorSize:
-                raise ValueError("rotorOffset is larger than rotorSize")
-            self.rotor = self.rotor[self.rotorOffset:] + self.rotor[:self.rotorOffset]
-
+        self.rewire(tables)
         self.__init_rotorPosition = self.rotorPosition
 
-    def getPosition(self, position: int) -> int:
-        index = (self.rotorPosition + position) % self.rotorSize
+        # Amount of advances until the rotor wraps around for the first time, see advanceRotor(). A position past
+        # the end of the rotor wraps on the first advance, a negative position counts up to the end of the rotor
+        if self.rotorPosition >= self.rotorSize:
+            self.__firstWrap = 1
+        else:
+            self.__firstWrap = self.rotorSize - self.rotorPosition
+
+    def rewire(self, tables: Union[List[bytes], None] = None) -> None:
+        """
+        Build the rotor and its lookup tables. This is done once when the rotor is made, call this again only
+        when the rotorSize, rotorOffset or scrambler has been changed
+        :param tables: Precomputed rotor and reverse rotor (see __export__), used instead of scrambling the rotor.
+                       They are used as they are, so they can be views on a memory mapped file
+        """
+        if tables is not None:
+            self.rotor, self.rotorReverse = tables[0], tables[1]
+            if len(self.rotor) != self.rotorSize or len(self.rotorReverse) != self.rotorSize:
+                raise ValueError("Precomputed tables don't fit the rotorSize")
+
+            # The rotor has to hold every position once and the reverse rotor has to undo it
+            positions = bytes(range(self.rotorSize))
+            if bytes(sorted(self.rotor)) != positions or \
+                    bytes(self.rotor).translate(bytes(self.rotorReverse) + bytes(256 - self.rotorSize)) != positions:
+                raise ValueError("Precomputed tables aren't a permutation of the rotor positions")
+        else:
+            self.rotor = bytearray(range(self.rotorSize))
+
+            if isinstance(self.scrambler, scrambler):
+                self.rotor = self.scrambler.scramble(self.rotor)
+            elif self.scrambler is not None:
+                raise AttributeError(f"given scrambler is of unknown type '{type(self.scrambler)}'")
+
+            if self.rotorOffset != 0:
+                if abs(self.rotorOffset) > self.rotorSize:
+                    raise ValueError("rotorOffset is larger than rotorSize")
+                self.rotor = self.rotor[self.rotorOffset:] + self.rotor[:self.rotorOffset]
+
+            # Reverse lookup table, the rotor value is the index and the position in the rotor the value
+            self.rotorReverse = bytearray(self.rotorSize)
+            for index, value in enumerate(self.rotor):
+                self.rotorReverse[value] = index
+
+        # Tables for segments, indexing them replaces the modulo of getPosition() and getPositionReverse()
+        self.__rotorSegment = bytes(self.rotor) * (2 + 256 // self.rotorSize) if self.rotorSize else bytes()
+        self.__rotorModulo = bytes(range(self.rotorSize))
+
+    def getPosition(self, position: int, rotorPosition: Union[int, None] = None) -> int:
+        if rotorPosition is None:
+            rotorPosition = self.rotorPosition
+        index = (rotorPosition + position) % self.rotorSize
         return self.rotor[index]
 
-    def getPositionReverse(self, position: int) -> int:
-        return (self.rotor.index(position) - self.rotorPosition) % self.rotorSize
+    def getPositionReverse(self, position: int, rotorPosition: Union[int, None] = None) -> int:
+        if rotorPosition is None:
+            rotorPosition = self.rotorPosition
+        return (self.rotorReverse[position] - rotorPosition) % self.rotorSize
+
+    def getPositionSegment(self, indexes: Iterable[int], rotorPosition: Union[int, None] = None) -> Iterator[int]:
+        """
+        getPosition() for a segment of chars in which the rotor advances every char.
+        The segment can't be longer than rotorSize - rotorPosition
+        :param indexes: Index of every char
+        :param rotorPosition: Position of the rotor at the first char, defaults to rotorPosition
+        :return: Rotor value of every char
+        """
+        if rotorPosition is None:
+            rotorPosition = self.rotorPosition
+        return map(self.__rotorSegment.__getitem__, map(add, range(rotorPosition, self.rotorSize), indexes))
+
+    def getPositionReverseSegment(self, indexes: Iterable[int],
+                                  rotorPosition: Union[int, None] = None) -> Iterator[int]:
+        """
+        getPositionReverse() for a segment of chars in which the rotor advances every char.
+        The segment can't be longer than rotorSize - rotorPosition
+        :param indexes: Index of every char
+        :param rotorPosition: Position of the rotor at the first char, defaults to rotorPosition
+        :return: Rotor value of every char
+        """
+        if rotorPosition is None:
+            rotorPosition = self.rotorPosition
+
+        # The difference lies between -rotorSize and rotorSize, negative indexes wrap around the modulo table
+        return map(self.__rotorModulo.__getitem__, map(
+            sub, map(self.rotorReverse.__getitem__, indexes), range(rotorPosition, self.rotorSize)
+        ))
+
+    def getPositionArray(self, positions: 'numpy.ndarray', indexes: 'numpy.ndarray') -> 'numpy.ndarray':
+        """
+        Vectorized getPosition() for NumPy arrays
+        :param positions: Rotor position of every char
+        :param indexes: Index of every char
+        :return: Rotor value of every char
+        """
+        rotor = numpy.frombuffer(self.rotor, dtype=numpy.uint8)
+        return rotor[(positions + indexes) % self.rotorSize]
+
+    def getPositionReverseArray(self, positions: 'numpy.ndarray', indexes: 'numpy.ndarray') -> 'numpy.ndarray':
+        """
+        Vectorized getPositionReverse() for NumPy arrays
+        :param positions: Rotor position of every char
+        :param indexes: Index of every char
+        :return: Rotor value of every char
+        """
+        rotor_reverse = numpy.frombuffer(self.rotorReverse, dtype=numpy.uint8)
+        return (rotor_reverse[indexes] - positions) % self.rotorSize
 
     def advanceRotor(self) -> bool:
         self.rotorPosition += 1
@@ -61,18 +162,62 @@ class enigmaRotor(baseHelper):
             return True
         return False
 
+    def positionAt(self, advances: Union[int, 'numpy.ndarray']) -> Tuple[Any, Any]:
+        """
+        Get the position of the rotor after the given amount of advances since the last reset, without changing it.
+        The position is within the rotor, also when the rotor started outside of it
+        :param advances: Amount of advances, or a NumPy array of them
+        :return: Amount of times the rotor wrapped around and the position
+        """
+        start = self.__init_rotorPosition
+        if 0 <= start < self.rotorSize:
+            return divmod(start + advances, self.rotorSize)
+
+        # Before the first wrap the position counts on from the start, after it from 0
+        wraps = (advances - self.__firstWrap) // self.rotorSize + 1
+        wrapped = (advances - self.__firstWrap) % self.rotorSize
+        unwrapped = (start + advances) % self.rotorSize
+        if isinstance(wraps, int):
+            return max(wraps, 0), wrapped if wraps > 0 else unwrapped
+        return numpy.maximum(wraps, 0), numpy.where(wraps > 0, wrapped, unwrapped)
+
+    def advancesUntilWrap(self, advances: int) -> int:
+        """
+        Get the amount of advances until the rotor wraps around again
+        :param advances: Amount of advances since the last reset
+        :return: Amount of advances after which the rotor has wrapped around once more
+        """
+        if advances < self.__firstWrap:
+            return self.__firstWrap - advances
+        return self.rotorSize - (advances - self.__firstWrap) % self.rotorSize
+
+    def seekRotor(self, advances: int) -> int:
+        """
+        Set the position as if the rotor has been advanced the given amount of times since the last reset
+        :param advances: Amount of advances
+        :return: Amount of times the rotor wrapped around
+        """
+        wraps, position = self.positionAt(advances)
+
+        # Until the first wrap the position counts on from the start, like advanceRotor() does
+        self.rotorPosition = position if wraps else self.__init_rotorPosition + advances
+        return wraps
+
     def reset(self) -> None:
+        # The wiring doesn't change while encrypting, so only the position has to be restored
         self.rotorPosition = self.__init_rotorPosition
-        self.__post_init__()
 
     @staticmethod
     def __export__(model: 'enigmaRotor') -> List[Any]:
-        return [
+        attributes = [
             model.rotorSize,
             model.__init_rotorPosition,
             model.rotorOffset,
             export_model(model.scrambler)
         ]
+        if tables_exported():
+            attributes.append([export_table(model.rotor), export_table(model.rotorReverse)])
+        return attributes
 
     @staticmethod
     def __import__(attributes: List[Any]) -> 'enigmaRotor':
@@ -80,7 +225,8 @@ class enigmaRotor(baseHelper):
             rotorSize=attributes[0],
             rotorPosition=attributes[1],
             rotorOffset=attributes[2],
-            scrambler=import_model(attributes[3])
+            scrambler=import_model(attributes[3]),
+            tables=attributes[4] if len(attributes) > 4 else None
         )
 
 
@@ -1,10 +1,10 @@
 # Library's
-from typing import List, Any
-from dataclasses import dataclass, field
+from typing import List, Any, Tuple, Union
+from dataclasses import dataclass, field, InitVar, KW_ONLY
 
 # Drivers
 from core.driver.basemodel import baseModel, typeInput
-from core.driver.encoder import export_model, import_model
+from core.driver.encoder import export_model, import_model, tables_exported, export_table
 
 # Helpers
 from core.helpers.scrambler import scrambler
@@ -42,7 +42,16 @@ class shift(baseModel):
     ascii_scope: 'ascii_scope' = field(default_factory=ascii_scope)
     scrambler: 'scrambler' = field(default=None)
 
-    def __post_init__(self):
+    # Local variables, not exported
+    __scope_chars: bytes = field(default=b'', init=False, repr=False)
+    __outside_chars: bytes = field(default=b'', init=False, repr=False)
+    __encrypt_table: bytes = field(default=b'', init=False, repr=False)
+    __decrypt_table: bytes = field(default=b'', init=False, repr=False)
+
+    _: KW_ONLY
+    tables: InitVar[Union[List[bytes], None]] = None
+
+    def __post_init__(self, tables: Union[List[bytes], None]):
         """
         Function that should be used for checking the validity of the variables
         """
@@ -55,10 +64,52 @@ class shift(baseModel):
             if not isinstance(self.scrambler, scrambler):
                 raise TypeError(f'scramble_scope variable is of incorrect type: {self.scrambler}')
 
-            self.ascii_scope.scope = self.scrambler.scramble(self.ascii_scope.scope)
+            if tables is not None:
+                # Precomputed scrambled scope (see __export__)
+                if sorted(tables[0]) != sorted(self.ascii_scope.scope):
+                    raise ValueError("Precomputed tables don't fit the ascii_scope")
+                self.ascii_scope.scope = bytearray(tables[0])
+            else:
+                self.ascii_scope.scope = self.scrambler.scramble(self.ascii_scope.scope)
+            self.ascii_scope.update_index()
+        elif tables is not None and bytes(tables[0]) != bytes(self.ascii_scope.scope):
+            raise ValueError("Precomputed tables don't fit the ascii_scope")
+
+        # A shift over a fixed scope is a fixed substitution, so build the translation tables once
+        self.__scope_chars = bytes(self.ascii_scope.scope)
+        self.__outside_chars = bytes(range(256)).translate(None, self.__scope_chars)
+        if tables is not None and len(tables) > 1:
+            # The tables are used as they are, so they can be views on a memory mapped file
+            self.__encrypt_table, self.__decrypt_table = tables[1], tables[2]
+            self.__check_tables()
+        else:
+            self.__encrypt_table = self.__build_table(self.shift_amount)
+            self.__decrypt_table = self.__build_table(-self.shift_amount)
 
         self.update_id()
 
+    def __build_table(self, amount: int) -> bytes:
+        """
+        Internal function for building a translation table usable by bytes.translate()
+        :param amount: Amount to shift (can be negative)
+        :return: 256 byte table, chars outside the scope map to themselves
+        """
+        table = bytearray(range(256))
+        for char in set(self.__scope_chars):
+            table[char] = self.__hidden_shift(char, amount)[0]
+        return bytes(table)
+
+    def __check_tables(self) -> None:
+        """
+        Internal function for checking precomputed translation tables. The decrypt table has to undo the encrypt
+        table and chars outside the scope have to map to themselves
+        """
+        all_chars = bytes(range(256))
+        if len(self.__encrypt_table) != 256 or len(self.__decrypt_table) != 256 or \
+                all_chars.translate(self.__encrypt_table).translate(self.__decrypt_table) != all_chars or \
+                self.__outside_chars.translate(self.__encrypt_table) != self.__outside_chars:
+            raise ValueError("Precomputed tables aren't a permutation of the ascii_scope")
+
     def __hidden_shift(self, content: bytes, amount: int) -> bytes:
         """
         Internal shift function
@@ -82,6 +133,25 @@ class shift(baseModel):
         # Return the encrypted char
         return self.ascii_scope.scope[move].to_bytes(1, 'little')
 
+    def __hidden_shift_buffer(self, content: bytearray, table: bytes) -> bytes:
+        """
+        Internal shift function for a whole message
+        :param content: Chars to shift
+        :param table: Translation table to shift with
+        :return: Encrypted chars
+        """
+        if isinstance(content, memoryview):
+            content = bytes(content)
+
+        # Chars outside the scope are deleted while translating, so a shorter result means they were there
+        new_content = content.translate(table, self.__outside_chars)
+        if len(new_content) != len(content):
+            outside_chars = content.translate(None, self.__scope_chars)
+            offset = min(content.index(char) for char in set(outside_chars))
+            raise ValueError(f"Given character '{content[offset]}' at offset {offset} "
+                             f"does not fit the scope '{self.ascii_scope.setting}'")
+        return new_content
+
     def encrypt(self, content: bytes) -> bytes:
         """
         Encrypt the input that is given
@@ -98,6 +168,63 @@ class shift(baseModel):
         """
         return self.__hidden_shift(content, -self.shift_amount)
 
+    def encrypt_buffer(self, content: bytearray, offset: int = 0) -> bytearray:
+        """
+        Encrypt a whole message with the translation table
+        :param content: bytes you want encrypted
+        :param offset: Index of the content in the message, a shift doesn't depend on it
+        :return: encrypted input
+        """
+        return bytearray(self.__hidden_shift_buffer(content, self.__encrypt_table))
+
+    def decrypt_buffer(self, content: bytearray, offset: int = 0) -> bytearray:
+        """
+        Decrypt a whole message with the translation table
+        :param content: bytes you want decrypted
+        :param offset: Index of the content in the message, a shift doesn't depend on it
+        :return: decrypted input
+        """
+        return bytearray(self.__hidden_shift_buffer(content, self.__decrypt_table))
+
+    def encrypt_into(self, content: bytearray, target: bytearray) -> None:
+        """
+        Encrypt a whole message with the translation table straight into the target
+        :param content: bytes you want encrypted
+        :param target: buffer the encrypted input is written to
+        """
+        target[:] = self.__hidden_shift_buffer(content, self.__encrypt_table)
+
+    def decrypt_into(self, content: bytearray, target: bytearray) -> None:
+        """
+        Decrypt a whole message with the translation table straight into the target
+        :param content: bytes you want decrypted
+        :param target: buffer the decrypted input is written to
+        """
+        target[:] = self.__hidden_shift_buffer(content, self.__decrypt_table)
+
+    def preserves_length(self) -> bool:
+        return True
+
+    def chunk_alignment(self) -> int:
+        return 1
+
+    def encrypt_chunk(self, content: bytearray, offset: int, length: int) -> bytearray:
+        return self.encrypt_buffer(content)
+
+    def decrypt_chunk(self, content: bytearray, offset: int, length: int) -> bytearray:
+        return self.decrypt_buffer(content)
+
+    def substitution(self, encrypt: bool) -> Tuple[bytes, bytes]:
+        """
+        A shift is a fixed substitution, so the encrypter can fuse it with other substitutions
+        :param encrypt: If the table is used for encrypting or decrypting
+        :return: Translation table and the chars of the scope
+        """
+        return self.__encrypt_table if encrypt else self.__decrypt_table, self.__scope_chars
+
+    def accepted_chars(self, encrypt: bool) -> bytes:
+        return self.__scope_chars
+
     @staticmethod
     def __export__(model: 'shift') -> List[Any]:
         """
@@ -105,18 +232,26 @@ class shift(baseModel):
         Return all the variables needed to recreate the model
         :return: List with values for init
         """
-        return [
+        attributes = [
             model.shift_amount,
             export_model(model.ascii_scope),
             export_model(model.scrambler)
         ]
+        if tables_exported():
+            attributes.append([
+                export_table(model.ascii_scope.scope),
+                export_table(model.__encrypt_table),
+                export_table(model.__decrypt_table)
+            ])
+        return attributes
 
     @staticmethod
     def __import__(attributes: List[Any]) -> 'shift':
         return shift(
             shift_amount=attributes[0],
             ascii_scope=import_model(attributes[1]),
-            scrambler=import_model(attributes[2])
+            scrambler=import_model(attributes[2]),
+            tables=attributes[3] if len(attributes) > 3 else None
         )
 
 
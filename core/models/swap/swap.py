@@ -1,7 +1,8 @@
 # Library's
 from enum import Enum
 from warnings import warn
-from typing import List, Callable, Any
+from operator import itemgetter
+from typing import List, Callable, Any, Sequence, MutableSequence, Union, Iterable, Iterator, BinaryIO
 from dataclasses import dataclass, field
 
 # Drivers
@@ -59,9 +60,6 @@ class swap(baseModel):
     section_amount: int = field(default=1)
     scrambler: 'scrambler' = field(default=None)
 
-    # Local variables, not exported
-    __encrypt_toggle: bool = field(default=True, init=False)
-
     def __post_init__(self):
         """
         Function that should be used for checking the validity of the variables
@@ -87,65 +85,388 @@ class swap(baseModel):
         # Update the id when the object constructor is called
         self.update_id()
 
+    @staticmethod
+    def __reverse_blocks(source: Sequence, source_start: int, target: MutableSequence, target_start: int,
+                         size: int, block_size: int) -> None:
+        """
+        Internal function for copying blocks of data to the target in reversed order
+        :param source: The data to copy from
+        :param source_start: Index of the first block in the source
+        :param target: The data to copy to
+        :param target_start: Index of the first block in the target
+        :param size: Total size of the blocks, multiple of block_size
+        :param block_size: Size of a block
+        """
+        blocks = size // block_size
+
+        # Use the least amount of slice operations, either one per block or one per index within a block
+        if blocks <= block_size:
+            for block in range(blocks):
+                start = source_start + (blocks - block - 1) * block_size
+                target_block = target_start + block * block_size
+                target[target_block:target_block + block_size] = source[start:start + block_size]
+        else:
+            for offset in range(block_size):
+                target[target_start + offset:target_start + size:block_size] = \
+                    source[source_start + offset:source_start + size:block_size][::-1]
+
+    def __reverse_into(self, source: Sequence, target: MutableSequence) -> None:
+        """
+        Internal function for reversing data into a target that is a copy of the data.
+        The outer reverse_amount blocks swap places, then the blocks within them and so on until the middle part
+        is smaller than two blocks. This means that the order of all the blocks before and after the middle part
+        is reversed.
+        :param source: The data
+        :param target: Copy of the data which will hold the reversed data
+        """
+        size = len(source) // (self.reverse_amount * 2) * self.reverse_amount
+        self.__reverse_blocks(source, len(source) - size, target, 0, size, self.reverse_amount)
+        self.__reverse_blocks(source, 0, target, len(source) - size, size, self.reverse_amount)
+
     def __reverse_swap(self, data: bytearray) -> bytearray:
         """
         Internal function for reversing incoming data
         :param data: The data
         :return: The reversed data
         """
-        if len(data) <= self.reverse_amount * 2 - 1:
-            return data
-        return data[-self.reverse_amount:] + self.__reverse_swap(
-            data[self.reverse_amount:-self.reverse_amount]
-        ) + data[:self.reverse_amount]
+        content = bytearray(data)
+        self.__reverse_into(memoryview(data), content)
+        return content
 
-    def __scramble_swap(self, data: bytearray) -> bytearray:
+    def __scramble_swap(self, data: bytearray, encrypt: bool) -> bytearray:
         """
         Internal function for scrambling the data (setting random)
         :param data: The data
+        :param encrypt: If the data is scrambled or unscrambled
         :return: The scrambled data
         """
-        if self.__encrypt_toggle:
+        if encrypt:
             return self.scrambler.scramble(data)
         return self.scrambler.unscramble(data)
 
-    def __section_swap(self, data: bytearray, function: Callable[[bytearray], bytearray]) -> bytearray:
+    def __scramble_layout(self, encrypt: bool) -> Sequence[int]:
+        """
+        Internal function for getting the layout of a scrambled section (setting sectionRandom).
+        Every section is scrambled with the same seed, so every section gets the same permutation
+        :param encrypt: If the section is scrambled or unscrambled
+        :return: Index in the section for every index in the scrambled section
+        """
+        if encrypt:
+            return self.scrambler.permutation(self.section_amount)
+        return self.scrambler.inverse_permutation(self.section_amount)
+
+    @staticmethod
+    def __gather(layout: Sequence[int]) -> Callable[[Sequence[int]], bytes]:
+        """
+        Internal function for making a function that swaps a section according to a layout
+        :param layout: Index in the section for every index in the swapped section
+        :return: Function that swaps a section
         """
-        Function for using a function over multiple sections of the given data
+        if len(layout) == 1:
+            return bytes
+
+        getter = itemgetter(*layout)
+        return lambda section: bytes(getter(section))
+
+    def __section_end(self, length: int) -> int:
+        """
+        Internal function for getting the end of the sections. Sections are swapped as long as the remaining data
+        is at least two sections long, the remainder is left as it is
+        :param length: Length of the data
+        :return: Index of the end of the last swapped section
+        """
+        return max(length // self.section_amount - 1, 0) * self.section_amount
+
+    def __section_swap(self, data: bytearray, end: int, function: Callable[[bytearray], bytearray],
+                       layout: Union[Callable[[], Sequence[int]], None] = None,
+                       target: Union[bytearray, None] = None) -> bytearray:
+        """
+        Function for swapping every section of the given data in the same way
         :param data: The data
-        :param function: Function that swaps data given to it
+        :param end: Index of the end of the last section that gets swapped
+        :param function: Function that swaps a section given to it
+        :param layout: Function that returns the index in the section of the data for every index in a swapped
+                       section. If given, used instead of function when there are more sections than indexes in a
+                       section
+        :param target: Copy of the data which will hold the swapped data, a new copy is made if not given
         :return: The section swapped data
         """
-        if len(data) <= self.section_amount * 2 - 1:
-            return data
-        return function(data[:self.section_amount]) + self.__section_swap(data[self.section_amount:], function)
+        content = bytearray(data) if target is None else target
+        if layout is None or end // self.section_amount <= self.section_amount:
+            for start in range(0, end, self.section_amount):
+                content[start:start + self.section_amount] = function(data[start:start + self.section_amount])
+        else:
+            # Every index in a section is copied for all sections at once
+            for index, source in enumerate(layout()):
+                content[index:end:self.section_amount] = data[source:end:self.section_amount]
+        return content
 
-    def encrypt(self, content: bytearray) -> bytearray:
+    def __reverse_layout(self) -> List[int]:
         """
-        Encrypt the input that is given
-        :param content: string you want encrypted
-        :return: encrypted input
+        Internal function for getting the layout of a reversed section
+        :return: Index in the section for every index in the reversed section
+        """
+        layout = list(range(self.section_amount))
+        self.__reverse_into(range(self.section_amount), layout)
+        return layout
+
+    def __hidden_section_swap(self, content: bytearray, end: int, encrypt: bool,
+                              target: Union[bytearray, None] = None) -> bytearray:
+        """
+        Internal function for the section settings
+        :param content: The data
+        :param end: Index of the end of the last section that gets swapped
+        :param encrypt: If the sections are encrypted or decrypted
+        :param target: Copy of the data which will hold the swapped data, see __section_swap
+        :return: The section swapped data
+        """
+        if self.setting == swapSetting.sectionReverse:
+            return self.__section_swap(content, end, self.__reverse_swap, self.__reverse_layout, target)
+        elif self.setting == swapSetting.sectionRandom:
+            layout = self.__scramble_layout(encrypt)
+            return self.__section_swap(content, end, self.__gather(layout), lambda: layout, target)
+        raise TypeError(f"swapSetting {self.setting} doesn't use sections")
+
+    def __hidden_swap(self, content: bytearray, encrypt: bool) -> bytearray:
+        """
+        Internal function for swapping a whole message. The direction is given instead of kept on the model, so
+        the model can be used by many threads at once
+        :param content: The data
+        :param encrypt: If the data is encrypted or decrypted
+        :return: The swapped data
         """
         if self.setting == swapSetting.reverse:
             return self.__reverse_swap(content)
         elif self.setting == swapSetting.random:
-            return self.__scramble_swap(content)
-        elif self.setting == swapSetting.sectionReverse:
-            return self.__section_swap(content, lambda x: self.__reverse_swap(x))
-        elif self.setting == swapSetting.sectionRandom:
-            return self.__section_swap(content, lambda x: self.__scramble_swap(x))
+            return self.__scramble_swap(content, encrypt)
+        elif self.setting in (swapSetting.sectionReverse, swapSetting.sectionRandom):
+            return self.__hidden_section_swap(content, self.__section_end(len(content)), encrypt)
         raise TypeError(f'swapSetting {self.setting} is not supported')
 
+    def encrypt(self, content: bytearray) -> bytearray:
+        """
+        Encrypt the input that is given
+        :param content: string you want encrypted
+        :return: encrypted input
+        """
+        return self.__hidden_swap(content, encrypt=True)
+
     def decrypt(self, content: bytearray) -> bytearray:
         """
         Decrypt the input that is given
         :param content: string you want decrypted
         :return: decrypted input
         """
-        self.__encrypt_toggle = False
-        content = self.encrypt(content)
-        self.__encrypt_toggle = True
-        return content
+        return self.__hidden_swap(content, encrypt=False)
+
+    def __hidden_swap_into(self, content: bytearray, target: bytearray, encrypt: bool) -> None:
+        """
+        Internal function for swapping a whole message into a buffer of the same length, the reverse and section
+        settings copy their blocks directly to it
+        :param content: The data
+        :param target: Buffer the swapped data is written to
+        :param encrypt: If the data is encrypted or decrypted
+        """
+        if self.setting == swapSetting.reverse:
+            target[:] = content
+            self.__reverse_into(memoryview(content), target)
+        elif self.setting in (swapSetting.sectionReverse, swapSetting.sectionRandom):
+            target[:] = content
+            self.__hidden_section_swap(content, self.__section_end(len(content)), encrypt, target)
+        elif self.setting == swapSetting.random and encrypt:
+            # scramble() changes the data it is given, so it gets the target instead of the content
+            target[:] = content
+            self.scrambler.scramble(target)
+        else:
+            target[:] = self.__hidden_swap(content, encrypt)
+
+    def encrypt_into(self, content: bytearray, target: bytearray) -> None:
+        """
+        Encrypt the input into a buffer of the same length
+        :param content: string you want encrypted
+        :param target: buffer the encrypted input is written to
+        """
+        self.__hidden_swap_into(content, target, encrypt=True)
+
+    def decrypt_into(self, content: bytearray, target: bytearray) -> None:
+        """
+        Decrypt the input into a buffer of the same length
+        :param content: string you want decrypted
+        :param target: buffer the decrypted input is written to
+        """
+        self.__hidden_swap_into(content, target, encrypt=False)
+
+    def preserves_length(self) -> bool:
+        return True
+
+    def output_chars(self, chars: bytes, encrypt: bool) -> bytes:
+        # Swapping only moves the chars
+        return chars
+
+    def chunk_alignment(self) -> int:
+        """
+        Section settings can be split on the sections, the other settings need the whole message
+        :return: section_amount for section settings, else 0
+        """
+        if self.setting in (swapSetting.sectionReverse, swapSetting.sectionRandom):
+            return self.section_amount
+        return 0
+
+    def encrypt_chunk(self, content: bytearray, offset: int, length: int) -> bytearray:
+        """
+        Encrypt the sections within a part of the message
+        :param content: Part of the message
+        :param offset: Index of the part in the message, a multiple of section_amount
+        :param length: Length of the whole message
+        :return: encrypted part
+        """
+        end = min(max(self.__section_end(length) - offset, 0), len(content))
+        return self.__hidden_section_swap(content, end, encrypt=True)
+
+    def decrypt_chunk(self, content: bytearray, offset: int, length: int) -> bytearray:
+        """
+        Decrypt the sections within a part of the message
+        :param content: Part of the message
+        :param offset: Index of the part in the message, a multiple of section_amount
+        :param length: Length of the whole message
+        :return: decrypted part
+        """
+        end = min(max(self.__section_end(length) - offset, 0), len(content))
+        return self.__hidden_section_swap(content, end, encrypt=False)
+
+    def can_stream(self) -> bool:
+        """
+        Section settings stream per section, the other settings need the whole message
+        :return: If the setting is a section setting
+        """
+        return self.chunk_alignment() > 0
+
+    def __hidden_section_stream(self, chunks: Iterable[bytes], encrypt: bool) -> Iterator[bytearray]:
+        """
+        Internal function for swapping the sections of a message that arrives in parts
+        :param chunks: Parts of the message
+        :param encrypt: If the sections are encrypted or decrypted
+        :return: Swapped parts
+        """
+        content = bytearray()
+        for chunk in chunks:
+            content += chunk
+
+            # Sections are swapped as long as at least two sections remain, more data can only follow
+            end = self.__section_end(len(content))
+            if end:
+                new_content = self.__hidden_section_swap(content[:end], end, encrypt)
+                del content[:end]
+                yield new_content
+
+        # Less than two sections remain, which are left as they are
+        yield content
+
+    def encrypt_stream(self, chunks: Iterable[bytes]) -> Iterator[bytearray]:
+        """
+        Encrypt a message that arrives in parts, section settings keep less than two sections in memory
+        :param chunks: Parts of the message you want encrypted
+        :return: Encrypted parts
+        """
+        if not self.can_stream():
+            return super().encrypt_stream(chunks)
+        return self.__hidden_section_stream(chunks, encrypt=True)
+
+    def decrypt_stream(self, chunks: Iterable[bytes]) -> Iterator[bytearray]:
+        """
+        Decrypt a message that arrives in parts, section settings keep less than two sections in memory
+        :param chunks: Parts of the message you want decrypted
+        :return: Decrypted parts
+        """
+        if not self.can_stream():
+            return super().decrypt_stream(chunks)
+        return self.__hidden_section_stream(chunks, encrypt=False)
+
+    def can_seek(self) -> bool:
+        """
+        The reverse setting can read the blocks from both ends of a seekable file
+        :return: If the setting is reverse
+        """
+        return self.setting == swapSetting.reverse
+
+    @staticmethod
+    def __copy_file(source: BinaryIO, source_start: int, target: BinaryIO, target_start: int, size: int,
+                    buffer_size: int) -> None:
+        """
+        Internal function for copying a part of a file to another file
+        :param source: File to copy from
+        :param source_start: Position of the part in the source
+        :param target: File to copy to
+        :param target_start: Position of the part in the target
+        :param size: Size of the part
+        :param buffer_size: Amount of bytes copied at once
+        """
+        for start in range(0, size, buffer_size):
+            source.seek(source_start + start)
+            target.seek(target_start + start)
+            target.write(source.read(min(buffer_size, size - start)))
+
+    def __reverse_file_blocks(self, source: BinaryIO, source_start: int, target: BinaryIO, target_start: int,
+                              size: int, buffer_size: int) -> None:
+        """
+        Internal function for copying blocks of a file to another file in reversed order, see __reverse_blocks
+        :param source: File to copy from
+        :param source_start: Position of the first block in the source
+        :param target: File to copy to
+        :param target_start: Position of the first block in the target
+        :param size: Total size of the blocks, multiple of reverse_amount
+        :param buffer_size: Amount of bytes held at once
+        """
+        blocks = size // self.reverse_amount
+
+        # A read and its reversed copy have to fit in the buffer, otherwise blocks are copied in parts
+        group = buffer_size // (self.reverse_amount * 2)
+        if not group:
+            for block in range(blocks):
+                self.__copy_file(source, source_start + (blocks - block - 1) * self.reverse_amount,
+                                 target, target_start + block * self.reverse_amount,
+                                 self.reverse_amount, buffer_size)
+            return
+
+        for first in range(0, blocks, group):
+            count = min(group, blocks - first)
+            source.seek(source_start + (blocks - first - count) * self.reverse_amount)
+            data = source.read(count * self.reverse_amount)
+
+            content = bytearray(len(data))
+            self.__reverse_blocks(data, 0, content, 0, len(data), self.reverse_amount)
+            target.seek(target_start + first * self.reverse_amount)
+            target.write(content)
+
+    def encrypt_file(self, source: BinaryIO, target: BinaryIO, length: int, buffer_size: int) -> None:
+        """
+        Reverse a message in a seekable file to another seekable file, holding about buffer_size bytes at once
+        :param source: File holding the message from its current position
+        :param target: File the reversed message is written to from its current position
+        :param length: Length of the message
+        :param buffer_size: Amount of bytes held at once
+        """
+        if not self.can_seek():
+            return super().encrypt_file(source, target, length, buffer_size)
+
+        source_start = source.tell()
+        target_start = target.tell()
+        size = length // (self.reverse_amount * 2) * self.reverse_amount
+
+        self.__reverse_file_blocks(source, source_start + length - size, target, target_start, size, buffer_size)
+        self.__copy_file(source, source_start + size, target, target_start + size, length - size * 2, buffer_size)
+        self.__reverse_file_blocks(source, source_start, target, target_start + length - size, size, buffer_size)
+        target.seek(target_start + length)
+
+    def decrypt_file(self, source: BinaryIO, target: BinaryIO, length: int, buffer_size: int) -> None:
+        """
+        Reversing twice gives the original, so decrypting is the same as encrypting
+        :param source: File holding the message from its current position
+        :param target: File the message is written to from its current position
+        :param length: Length of the message
+        :param buffer_size: Amount of bytes held at once
+        """
+        self.encrypt_file(source, target, length, buffer_size)
 
     @staticmethod
     def __export__(model: 'swap') -> List[Any]: